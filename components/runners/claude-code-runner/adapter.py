@@ -8,19 +8,25 @@ Claude Code SDK and produces a stream of AG-UI protocol events.
 """
 
 import asyncio
+import functools
 import os
 import sys
 import logging
-import json as _json
+import operator
 import re
+import shlex
 import shutil
 import uuid
+from collections import deque
 from pathlib import Path
+from types import MappingProxyType
 from typing import AsyncIterator, Optional, Any
-from urllib.parse import urlparse, urlunparse
-from urllib import request as _urllib_request, error as _urllib_error
+from urllib.parse import urlparse
 from datetime import datetime, timezone
 
+import aiohttp
+import orjson
+
 # Set umask to make files readable by content service container
 os.umask(0o022)
 
@@ -45,10 +51,198 @@ from ag_ui.core import (
     RawEvent,
 )
 
+# Claude Agent SDK. Imported once at module load: the SDK only reads auth env
+# vars when the client spawns its CLI subprocess, not at import time.
+from claude_agent_sdk import (
+    ClaudeSDKClient,
+    ClaudeAgentOptions,
+    AssistantMessage,
+    UserMessage,
+    SystemMessage,
+    ResultMessage,
+    TextBlock,
+    ThinkingBlock,
+    ToolUseBlock,
+    ToolResultBlock,
+)
+from claude_agent_sdk.types import StreamEvent
+
 from context import RunnerContext
+from observability import ObservabilityManager
 
 logger = logging.getLogger(__name__)
 
+# Sanitization patterns for user context (compiled once at import)
+_USER_ID_DISALLOWED_RE = re.compile(r'[^a-zA-Z0-9@._-]')
+# str.translate deletion table for C0/C1 control characters (\x00-\x1f, \x7f-\x9f)
+_CONTROL_CHARS_TABLE = dict.fromkeys([*range(0x00, 0x20), *range(0x7f, 0xa0)])
+
+# Final path segment of a git URL, minus any .git suffix and trailing slashes
+# (fallback for URLs that are not owner/repo shaped)
+_REPO_NAME_RE = re.compile(r'[/:]([^/:]+?)(?:\.git)?/*$')
+
+# (host, owner, repo) from https://host/owner/repo(.git) or git@host:owner/repo(.git)
+# (query strings and fragments fall through to the urlparse path)
+_GIT_URL_RE = re.compile(
+    r'^(?:https?://(?P<http_host>[^/?#]+)/|git@(?P<ssh_host>[^:/?#]+):)'
+    r'(?P<owner>[^/?#]+)/(?P<repo>[^/?#]+?)(?:\.git)?/?$'
+)
+
+# ResultMessage fields copied into the /lastResult state delta
+_RESULT_FIELDS = ("subtype", "duration_ms", "is_error", "num_turns", "total_cost_usd", "result")
+_get_result_fields = operator.attrgetter(*_RESULT_FIELDS)
+
+# Anthropic API model names -> Vertex AI model names; anything else passes through unchanged
+_VERTEX_MODEL_MAP = MappingProxyType({
+    'claude-opus-4-5': 'claude-opus-4-5@20251101',
+    'claude-opus-4-1': 'claude-opus-4-1@20250805',
+    'claude-sonnet-4-5': 'claude-sonnet-4-5@20250929',
+    'claude-haiku-4-5': 'claude-haiku-4-5@20251001',
+})
+
+# Secret patterns for log redaction, as (regex, replacement). They are combined into one
+# alternation so a string is scanned once; at a shared start position the earlier entry wins.
+_SECRET_PATTERNS = (
+    (r'gh[pousr]_[a-zA-Z0-9]{36,255}', 'gh*_***REDACTED***'),
+    (r'sk-ant-[a-zA-Z0-9\-_]{30,200}', 'sk-ant-***REDACTED***'),
+    (r'pk-lf-[a-zA-Z0-9\-_]{10,100}', 'pk-lf-***REDACTED***'),
+    (r'sk-lf-[a-zA-Z0-9\-_]{10,100}', 'sk-lf-***REDACTED***'),
+    (r'x-access-token:[^@\s]+@', 'x-access-token:***REDACTED***@'),
+    (r'oauth2:[^@\s]+@', 'oauth2:***REDACTED***@'),
+    (r'://[^:@\s]+:[^@\s]+@', '://***REDACTED***@'),
+    (
+        r'(?P<env_var>ANTHROPIC_API_KEY|LANGFUSE_SECRET_KEY|LANGFUSE_PUBLIC_KEY|BOT_TOKEN|GIT_TOKEN)\s*=\s*[^\s\'"]+',
+        None,  # keeps the variable name; see _redact_match
+    ),
+)
+
+# Literals at least one of which appears in any _SECRET_PATTERNS match; text containing
+# none of them (most git output) can skip the regex scan entirely
+_SECRET_HINTS = ("ghp_", "gho_", "ghu_", "ghs_", "ghr_", "sk-ant-", "-lf-", "@", "_KEY", "_TOKEN")
+_SECRET_RE = re.compile('|'.join(f'(?P<s{i}>{pattern})' for i, (pattern, _) in enumerate(_SECRET_PATTERNS)))
+_SECRET_REPLACEMENTS = {f's{i}': repl for i, (_, repl) in enumerate(_SECRET_PATTERNS)}
+
+
+def _redact_match(m: re.Match) -> str:
+    """re.sub callback for _SECRET_RE."""
+    repl = _SECRET_REPLACEMENTS[m.lastgroup]
+    if repl is None:
+        return f"{m.group('env_var')}=***REDACTED***"
+    return repl
+
+
+# Lifetime of a cached per-host token; backend-minted GitHub tokens expire after an hour
+_TOKEN_CACHE_TTL_SECONDS = 600.0
+
+# Built-in Claude Code tools granted to every session; MCP servers are appended per run
+_BASE_ALLOWED_TOOLS = ("Read", "Write", "Bash", "Glob", "Grep", "Edit", "MultiEdit", "WebSearch", "WebFetch")
+
+
+def _json_dumps(obj: Any) -> str:
+    """Serialize obj to a JSON string with orjson."""
+    # OPT_NON_STR_KEYS keeps parity with json.dumps for int/float dict keys
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+
+@functools.lru_cache(maxsize=256)
+def _derive_repo_name(url: str) -> str:
+    """Return the repository name (owner/<repo>, minus .git) of a git URL."""
+    url = url.partition("#")[0].partition("?")[0]
+    repo = _parse_owner_repo(url)[1]
+    if not repo:
+        # Not an owner/repo URL; fall back to the last path segment
+        m = _REPO_NAME_RE.search(url)
+        repo = m.group(1) if m else ""
+    return repo.removesuffix(".git").strip()
+
+
+def _str_field(obj: dict, key: str, default: str = "") -> str:
+    """Return obj[key] stripped if it is a non-empty string, else default."""
+    value = obj.get(key)
+    if isinstance(value, str):
+        value = value.strip()
+        if value:
+            return value
+    return default
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_owner_repo(url: str) -> tuple[str, str, str]:
+    """Return (owner, name, host) from various URL formats, memoized per URL."""
+    s = (url or "").strip()
+    # Fast path for the common https://host/owner/repo and git@host:owner/repo shapes
+    m = _GIT_URL_RE.match(s)
+    if m:
+        return m.group("owner"), m.group("repo"), m.group("http_host") or m.group("ssh_host")
+    # Drop any fragment/query so a trailing .git is still recognised
+    s = s.partition("#")[0].partition("?")[0].removesuffix(".git")
+    host = "github.com"
+    try:
+        if s.startswith("http://") or s.startswith("https://"):
+            p = urlparse(s)
+            host = p.netloc
+            parts = [pt for pt in p.path.split("/") if pt]
+            if len(parts) >= 2:
+                return parts[0], parts[1], host
+        if s.startswith("git@") or ":" in s:
+            s2 = s
+            if s2.startswith("git@"):
+                s2 = s2.replace(":", "/", 1)
+                s2 = s2.replace("git@", "ssh://git@", 1)
+            p = urlparse(s2)
+            host = p.hostname or host
+            parts = [pt for pt in (p.path or "").split("/") if pt]
+            if len(parts) >= 2:
+                return parts[-2], parts[-1], host
+        parts = [pt for pt in s.split("/") if pt]
+        if len(parts) == 2:
+            return parts[0], parts[1], host
+    except Exception:
+        return "", "", host
+    return "", "", host
+
+
+def _usage_to_dict(usage: Any) -> Any:
+    """Convert a non-dict SDK usage object (dataclass/plain object or pydantic model) to a dict."""
+    try:
+        return vars(usage)
+    except TypeError:
+        # No __dict__ (e.g. __slots__-only); fall back to pydantic's serializer
+        return usage.model_dump()
+
+
+# Directories never searched for specs/: VCS metadata, dependency trees and build output
+_SPECS_SEARCH_SKIP_DIRS = frozenset({
+    ".git", "node_modules", ".venv", "venv", "target", "dist", "build", ".next",
+})
+
+
+def _find_specs_file(workspace: Path, required: str) -> bool:
+    """Return True if any ``specs/<feature>/`` dir under workspace contains required.
+
+    Breadth-first ``os.scandir`` walk that prunes dependency and build trees and
+    stops at the first hit, instead of enumerating the whole workspace.
+    """
+    pending = deque([str(workspace)])
+    while pending:
+        current = pending.popleft()
+        try:
+            with os.scandir(current) as it:
+                subdirs = [e for e in it if e.is_dir(follow_symlinks=False) and e.name not in _SPECS_SEARCH_SKIP_DIRS]
+        except OSError:
+            continue
+        for entry in subdirs:
+            if entry.name == "specs":
+                try:
+                    with os.scandir(entry.path) as features:
+                        for feature in features:
+                            if feature.is_dir(follow_symlinks=False) and os.path.exists(os.path.join(feature.path, required)):
+                                return True
+                except OSError:
+                    pass
+            pending.append(entry.path)
+    return False
+
 
 class PrerequisiteError(RuntimeError):
     """Raised when slash-command prerequisites are missing."""
@@ -62,6 +256,27 @@ class ClaudeCodeAdapter:
     Produces AG-UI events via async generator instead of WebSocket.
     """
 
+    __slots__ = (
+        "context",
+        "last_exit_code",
+        "_restart_requested",
+        "_first_run",
+        "_skip_resume_on_restart",
+        "_turn_count",
+        "_repos_cache",
+        "_workspace_prompt_cache",
+        "_token_cache",
+        "_current_message_id",
+        "_current_tool_id",
+        "_current_run_id",
+        "_current_thread_id",
+        "_active_client",
+        "_background_tasks",
+        "_workspace_prepared",
+        "_last_cwd",
+        "_http_session",
+    )
+
     def __init__(self):
         self.context: Optional[RunnerContext] = None
         self.last_exit_code = 1
@@ -70,6 +285,24 @@ class ClaudeCodeAdapter:
         self._skip_resume_on_restart = False
         self._turn_count = 0
 
+        # Set once the workspace has been prepared, so later re-preparation keeps existing checkouts
+        self._workspace_prepared = False
+
+        # Claude SDK cwd of the previous run; conversation continuation is scoped to it
+        self._last_cwd: Optional[str] = None
+
+        # Normalized repos mapping, parsed from REPOS_JSON on first use
+        self._repos_cache: Optional[list[dict]] = None
+
+        # Last workspace context prompt, as (inputs, prompt)
+        self._workspace_prompt_cache: Optional[tuple[tuple, str]] = None
+
+        # Token lookups per host, as (expires_at, future) so concurrent callers share one fetch
+        self._token_cache: dict[str, tuple[float, asyncio.Future]] = {}
+
+        # Shared HTTP session for backend calls, created on first use and closed in close()
+        self._http_session: Optional[aiohttp.ClientSession] = None
+
         # AG-UI streaming state
         self._current_message_id: Optional[str] = None
         self._current_tool_id: Optional[str] = None
@@ -79,10 +312,13 @@ class ClaudeCodeAdapter:
         # Active client reference for interrupt support
         self._active_client: Optional[Any] = None
 
+        # Fire-and-forget cleanup tasks, referenced here so they are not garbage collected
+        self._background_tasks: set[asyncio.Task] = set()
+
     async def initialize(self, context: RunnerContext):
         """Initialize the adapter with context."""
         self.context = context
-        logger.info(f"Initialized Claude Code adapter for session {context.session_id}")
+        logger.info("Initialized Claude Code adapter for session %s", context.session_id)
 
         # Copy Google OAuth credentials from mounted Secret to writable workspace location
         await self._setup_google_credentials()
@@ -90,6 +326,7 @@ class ClaudeCodeAdapter:
         # Prepare workspace from input repo if provided
         async for event in self._prepare_workspace():
             yield event
+        self._workspace_prepared = True
             
         # Initialize workflow if ACTIVE_WORKFLOW env vars are set
         async for event in self._initialize_workflow_if_set():
@@ -151,7 +388,7 @@ class ClaudeCodeAdapter:
                     # Check if message should be hidden from UI
                     is_hidden = isinstance(msg_metadata, dict) and msg_metadata.get('hidden', False)
                     if is_hidden:
-                        logger.info(f"Message {msg_id[:8]} marked as hidden (auto-sent initial/workflow prompt)")
+                        logger.info("Message %s marked as hidden (auto-sent initial/workflow prompt)", msg_id[:8])
                     
                     # Emit user message as TEXT_MESSAGE events
                     # Include metadata in RAW event for frontend filtering
@@ -193,9 +430,9 @@ class ClaudeCodeAdapter:
                     )
             
             # Extract user message from input
-            logger.info(f"Extracting user message from {len(input_data.messages)} messages")
+            logger.info("Extracting user message from %s messages", len(input_data.messages))
             user_message = self._extract_user_message(input_data)
-            logger.info(f"Extracted user message: '{user_message[:100] if user_message else '(empty)'}...'")
+            logger.info("Extracted user message: '%s...'", user_message[:100] if user_message else '(empty)')
             
             if not user_message:
                 logger.warning("No user message found in input")
@@ -213,10 +450,10 @@ class ClaudeCodeAdapter:
                 return
             
             # Run Claude SDK and yield events
-            logger.info(f"Starting Claude SDK with prompt: '{user_message[:50]}...'")
+            logger.info("Starting Claude SDK with prompt: '%s...'", user_message[:50])
             async for event in self._run_claude_agent_sdk(user_message, thread_id, run_id):
                 yield event
-            logger.info(f"Claude SDK processing completed for run {run_id}")
+            logger.info("Claude SDK processing completed for run %s", run_id)
             
             # Emit RUN_FINISHED
             yield RunFinishedEvent(
@@ -229,7 +466,7 @@ class ClaudeCodeAdapter:
             
         except PrerequisiteError as e:
             self.last_exit_code = 2
-            logger.error(f"Prerequisite validation failed: {e}")
+            logger.error("Prerequisite validation failed: %s", e)
             yield RunErrorEvent(
                 type=EventType.RUN_ERROR,
                 thread_id=thread_id,
@@ -238,7 +475,7 @@ class ClaudeCodeAdapter:
             )
         except Exception as e:
             self.last_exit_code = 1
-            logger.error(f"Error in process_run: {e}")
+            logger.error("Error in process_run: %s", e)
             yield RunErrorEvent(
                 type=EventType.RUN_ERROR,
                 thread_id=thread_id,
@@ -249,17 +486,18 @@ class ClaudeCodeAdapter:
     def _extract_user_message(self, input_data: RunAgentInput) -> str:
         """Extract user message text from RunAgentInput."""
         messages = input_data.messages or []
-        logger.info(f"Extracting from {len(messages)} messages, types: {[type(m).__name__ for m in messages]}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Extracting from %s messages, types: %s", len(messages), [type(m).__name__ for m in messages])
         
         # Find the last user message
         for msg in reversed(messages):
-            logger.debug(f"Checking message: type={type(msg).__name__}, hasattr(role)={hasattr(msg, 'role')}")
+            logger.debug("Checking message: type=%s, hasattr(role)=%s", type(msg).__name__, hasattr(msg, 'role'))
             
             if hasattr(msg, 'role') and msg.role == 'user':
                 # Handle different content formats
                 content = getattr(msg, 'content', '')
                 if isinstance(content, str):
-                    logger.info(f"Found user message (object format): '{content[:50]}...'")
+                    logger.info("Found user message (object format): '%s...'", content[:50])
                     return content
                 elif isinstance(content, list):
                     # Content blocks format
@@ -269,11 +507,11 @@ class ClaudeCodeAdapter:
                         elif isinstance(block, dict) and 'text' in block:
                             return block['text']
             elif isinstance(msg, dict):
-                logger.debug(f"Dict message: role={msg.get('role')}, content={msg.get('content', '')[:30]}...")
+                logger.debug("Dict message: role=%s, content=%s...", msg.get('role'), msg.get('content', '')[:30])
                 if msg.get('role') == 'user':
                     content = msg.get('content', '')
                     if isinstance(content, str):
-                        logger.info(f"Found user message (dict format): '{content[:50]}...'")
+                        logger.info("Found user message (dict format): '%s...'", content[:50])
                         return content
         
         logger.warning("No user message found!")
@@ -291,19 +529,23 @@ class ClaudeCodeAdapter:
             thread_id: AG-UI thread identifier
             run_id: AG-UI run identifier
         """
-        logger.info(f"_run_claude_agent_sdk called with prompt length={len(prompt)}, will create fresh client")
+        logger.info("_run_claude_agent_sdk called with prompt length=%d, will create fresh client", len(prompt))
+        obs: Optional[ObservabilityManager] = None
         try:
+            # Bind the session env lookup once; it is consulted throughout setup
+            get_env = self.context.get_env
+
             # Check for authentication method
             logger.info("Checking authentication configuration...")
-            api_key = self.context.get_env('ANTHROPIC_API_KEY', '')
-            use_vertex = self.context.get_env('CLAUDE_CODE_USE_VERTEX', '').strip() == '1'
+            api_key = get_env('ANTHROPIC_API_KEY', '')
+            use_vertex = get_env('CLAUDE_CODE_USE_VERTEX', '').strip() == '1'
             
-            logger.info(f"Auth config: api_key={'set' if api_key else 'not set'}, use_vertex={use_vertex}")
+            logger.info("Auth config: api_key=%s, use_vertex=%s", 'set' if api_key else 'not set', use_vertex)
 
             if not api_key and not use_vertex:
                 raise RuntimeError("Either ANTHROPIC_API_KEY or CLAUDE_CODE_USE_VERTEX=1 must be set")
 
-            # Set environment variables BEFORE importing SDK
+            # Set environment variables BEFORE creating the SDK client (it inherits os.environ)
             if api_key:
                 os.environ['ANTHROPIC_API_KEY'] = api_key
                 logger.info("Using Anthropic API key authentication")
@@ -315,34 +557,20 @@ class ClaudeCodeAdapter:
                     logger.info("Clearing ANTHROPIC_API_KEY to force Vertex AI mode")
                     del os.environ['ANTHROPIC_API_KEY']
 
-                os.environ['CLAUDE_CODE_USE_VERTEX'] = '1'
-                os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = vertex_credentials.get('credentials_path', '')
-                os.environ['ANTHROPIC_VERTEX_PROJECT_ID'] = vertex_credentials.get('project_id', '')
-                os.environ['CLOUD_ML_REGION'] = vertex_credentials.get('region', '')
-
-            # NOW we can safely import the SDK
-            from claude_agent_sdk import ClaudeSDKClient, ClaudeAgentOptions
-            from claude_agent_sdk import (
-                AssistantMessage,
-                UserMessage,
-                SystemMessage,
-                ResultMessage,
-                TextBlock,
-                ThinkingBlock,
-                ToolUseBlock,
-                ToolResultBlock,
-            )
-            from claude_agent_sdk.types import StreamEvent
-
-            from observability import ObservabilityManager
+                os.environ.update({
+                    'CLAUDE_CODE_USE_VERTEX': '1',
+                    'GOOGLE_APPLICATION_CREDENTIALS': vertex_credentials.get('credentials_path', ''),
+                    'ANTHROPIC_VERTEX_PROJECT_ID': vertex_credentials.get('project_id', ''),
+                    'CLOUD_ML_REGION': vertex_credentials.get('region', ''),
+                })
 
             # Extract and sanitize user context for observability
-            raw_user_id = os.getenv('USER_ID', '').strip()
-            raw_user_name = os.getenv('USER_NAME', '').strip()
+            raw_user_id = get_env('USER_ID', '').strip()
+            raw_user_name = get_env('USER_NAME', '').strip()
             user_id, user_name = self._sanitize_user_context(raw_user_id, raw_user_name)
 
             # Get model configuration
-            model = self.context.get_env('LLM_MODEL')
+            model = get_env('LLM_MODEL')
             configured_model = model or 'claude-sonnet-4-5@20250929'
 
             if use_vertex and model:
@@ -356,13 +584,13 @@ class ClaudeCodeAdapter:
             )
             await obs.initialize(
                 prompt=prompt,
-                namespace=self.context.get_env('AGENTIC_SESSION_NAMESPACE', 'unknown'),
+                namespace=get_env('AGENTIC_SESSION_NAMESPACE', 'unknown'),
                 model=configured_model
             )
             obs._pending_initial_prompt = prompt
 
             # Check if continuing from previous session
-            parent_session_id = self.context.get_env('PARENT_SESSION_ID', '').strip()
+            parent_session_id = get_env('PARENT_SESSION_ID', '').strip()
             is_continuation = bool(parent_session_id)
 
             # Determine cwd and additional dirs
@@ -380,31 +608,34 @@ class ClaudeCodeAdapter:
             elif repos_cfg:
                 cwd_path, add_dirs = self._setup_multi_repo_paths(repos_cfg)
             else:
-                cwd_path = str(Path(self.context.workspace_path) / "artifacts")
+                cwd_path = os.path.join(self.context.workspace_path, "artifacts")
 
             # Load ambient.json configuration
             ambient_config = self._load_ambient_config(cwd_path) if active_workflow_url else {}
 
             # Ensure working directory exists
-            cwd_path_obj = Path(cwd_path)
-            if not cwd_path_obj.exists():
-                logger.warning(f"Working directory does not exist, creating: {cwd_path}")
+            if not os.path.isdir(cwd_path):
+                logger.warning("Working directory does not exist, creating: %s", cwd_path)
                 try:
-                    cwd_path_obj.mkdir(parents=True, exist_ok=True)
-                except Exception as e:
-                    logger.error(f"Failed to create working directory: {e}")
+                    os.makedirs(cwd_path, exist_ok=True)
+                except OSError as e:
+                    logger.error("Failed to create working directory: %s", e)
                     cwd_path = self.context.workspace_path
 
-            logger.info(f"Claude SDK CWD: {cwd_path}")
-            logger.info(f"Claude SDK additional directories: {add_dirs}")
+            logger.info("Claude SDK CWD: %s", cwd_path)
+
+            # The SDK resumes conversations per cwd, so a moved cwd starts a fresh one
+            if self._last_cwd is not None and cwd_path != self._last_cwd:
+                logger.info("Claude SDK CWD changed from %s, starting a new conversation", self._last_cwd)
+                self._first_run = True
+            self._last_cwd = cwd_path
+            logger.info("Claude SDK additional directories: %s", add_dirs)
 
             # Load MCP server configuration
             mcp_servers = self._load_mcp_config(cwd_path)
-            allowed_tools = ["Read", "Write", "Bash", "Glob", "Grep", "Edit", "MultiEdit", "WebSearch", "WebFetch"]
+            allowed_tools = [*_BASE_ALLOWED_TOOLS, *(f"mcp__{name}" for name in mcp_servers or ())]
             if mcp_servers:
-                for server_name in mcp_servers.keys():
-                    allowed_tools.append(f"mcp__{server_name}")
-                logger.info(f"MCP tool permissions granted for servers: {list(mcp_servers.keys())}")
+                logger.info("MCP tool permissions granted for servers: %s", list(mcp_servers))
 
             # Build workspace context system prompt
             workspace_prompt = self._build_workspace_context_prompt(
@@ -438,7 +669,7 @@ class ClaudeCodeAdapter:
                         event={"type": "system_log", "message": "🔄 Continuing conversation from previous state"}
                     )
                 except Exception as e:
-                    logger.warning(f"Failed to set continue_conversation: {e}")
+                    logger.warning("Failed to set continue_conversation: %s", e)
 
             if self._skip_resume_on_restart:
                 self._skip_resume_on_restart = False
@@ -456,14 +687,14 @@ class ClaudeCodeAdapter:
                 except Exception:
                     pass
 
-            max_tokens_env = self.context.get_env('LLM_MAX_TOKENS') or self.context.get_env('MAX_TOKENS')
+            max_tokens_env = get_env('LLM_MAX_TOKENS') or get_env('MAX_TOKENS')
             if max_tokens_env:
                 try:
                     options.max_tokens = int(max_tokens_env)
                 except Exception:
                     pass
 
-            temperature_env = self.context.get_env('LLM_TEMPERATURE') or self.context.get_env('TEMPERATURE')
+            temperature_env = get_env('LLM_TEMPERATURE') or get_env('TEMPERATURE')
             if temperature_env:
                 try:
                     options.temperature = float(temperature_env)
@@ -491,7 +722,7 @@ class ClaudeCodeAdapter:
             except Exception as resume_error:
                 error_str = str(resume_error).lower()
                 if "no conversation found" in error_str or "session" in error_str:
-                    logger.warning(f"Conversation continuation failed: {resume_error}")
+                    logger.warning("Conversation continuation failed: %s", resume_error)
                     yield RawEvent(
                         type=EventType.RAW,
                         thread_id=thread_id,
@@ -503,6 +734,7 @@ class ClaudeCodeAdapter:
                 else:
                     raise
 
+            run_succeeded = False
             try:
                 # Store client reference for interrupt support
                 self._active_client = client
@@ -526,16 +758,20 @@ class ClaudeCodeAdapter:
                     step_name="processing_prompt",
                 )
 
-                logger.info(f"Sending query to Claude SDK: '{prompt[:100]}...'")
+                logger.info("Sending query to Claude SDK: '%s...'", prompt[:100])
                 await client.query(prompt)
                 logger.info("Query sent, waiting for response stream...")
 
                 # Process response stream
                 async for message in client.receive_response():
-                    logger.info(f"[ClaudeSDKClient]: {message}")
+                    logger.info("[ClaudeSDKClient]: %s", message)
+
+                    # SDK message and block types are concrete dataclasses, so a single
+                    # type() lookup per item replaces repeated isinstance() MRO walks
+                    message_type = type(message)
 
                     # Handle StreamEvent for real-time streaming chunks
-                    if isinstance(message, StreamEvent):
+                    if message_type is StreamEvent:
                         event_data = message.event
                         event_type = event_data.get('type')
 
@@ -564,30 +800,32 @@ class ClaudeCodeAdapter:
                         continue
 
                     # Capture SDK session ID from init message
-                    if isinstance(message, SystemMessage):
+                    if message_type is SystemMessage:
                         if message.subtype == 'init' and message.data.get('session_id'):
                             sdk_session_id = message.data.get('session_id')
-                            logger.info(f"Captured SDK session ID: {sdk_session_id}")
+                            logger.info("Captured SDK session ID: %s", sdk_session_id)
 
-                    if isinstance(message, (AssistantMessage, UserMessage)):
-                        if isinstance(message, AssistantMessage):
+                    if message_type is AssistantMessage or message_type is UserMessage:
+                        if message_type is AssistantMessage:
                             current_message = message
                             obs.start_turn(configured_model, user_input=prompt)
 
-                        # Process all blocks in the message
+                        # Process all blocks in the message. Block fields are read directly:
+                        # the exact-type dispatch guarantees the dataclass attributes exist.
                         for block in getattr(message, 'content', []) or []:
-                            if isinstance(block, TextBlock):
-                                text_piece = getattr(block, 'text', None)
+                            block_type = type(block)
+                            if block_type is TextBlock:
+                                text_piece = block.text
                                 if text_piece:
-                                    logger.info(f"TextBlock received (complete), text length={len(text_piece)}")
+                                    logger.info("TextBlock received (complete), text length=%d", len(text_piece))
 
-                            elif isinstance(block, ToolUseBlock):
-                                tool_name = getattr(block, 'name', '') or 'unknown'
-                                tool_input = getattr(block, 'input', {}) or {}
-                                tool_id = getattr(block, 'id', None) or str(uuid.uuid4())
+                            elif block_type is ToolUseBlock:
+                                tool_name = block.name or 'unknown'
+                                tool_input = block.input or {}
+                                tool_id = block.id or str(uuid.uuid4())
                                 parent_tool_use_id = getattr(message, 'parent_tool_use_id', None)
 
-                                logger.info(f"ToolUseBlock detected: {tool_name} (id={tool_id[:12]})")
+                                logger.info("ToolUseBlock detected: %s (id=%s)", tool_name, tool_id[:12])
 
                                 yield ToolCallStartEvent(
                                     type=EventType.TOOL_CALL_START,
@@ -599,7 +837,7 @@ class ClaudeCodeAdapter:
                                 )
 
                                 if tool_input:
-                                    args_json = _json.dumps(tool_input)
+                                    args_json = _json_dumps(tool_input)
                                     yield ToolCallArgsEvent(
                                         type=EventType.TOOL_CALL_ARGS,
                                         thread_id=thread_id,
@@ -610,16 +848,17 @@ class ClaudeCodeAdapter:
 
                                 obs.track_tool_use(tool_name, tool_id, tool_input)
 
-                            elif isinstance(block, ToolResultBlock):
-                                tool_use_id = getattr(block, 'tool_use_id', None)
-                                content = getattr(block, 'content', None)
-                                is_error = getattr(block, 'is_error', None)
-                                result_text = getattr(block, 'text', None)
-                                result_content = content if content is not None else result_text
+                            elif block_type is ToolResultBlock:
+                                tool_use_id = block.tool_use_id
+                                is_error = block.is_error
+                                result_content = block.content
+                                if result_content is None:
+                                    # Older SDK releases exposed plain-text results as .text
+                                    result_content = getattr(block, 'text', None)
 
                                 if result_content is not None:
                                     try:
-                                        result_str = _json.dumps(result_content)
+                                        result_str = _json_dumps(result_content)
                                     except (TypeError, ValueError):
                                         result_str = str(result_content)
                                 else:
@@ -637,9 +876,9 @@ class ClaudeCodeAdapter:
 
                                 obs.track_tool_result(tool_use_id, result_content, is_error or False)
 
-                            elif isinstance(block, ThinkingBlock):
-                                thinking_text = getattr(block, 'thinking', '')
-                                signature = getattr(block, 'signature', '')
+                            elif block_type is ThinkingBlock:
+                                thinking_text = block.thinking
+                                signature = block.signature
                                 yield RawEvent(
                                     type=EventType.RAW,
                                     thread_id=thread_id,
@@ -661,31 +900,32 @@ class ClaudeCodeAdapter:
                             )
                             self._current_message_id = None
 
-                    elif isinstance(message, SystemMessage):
+                    elif message_type is SystemMessage:
                         text = getattr(message, 'text', None)
                         if text:
                             yield RawEvent(
                                 type=EventType.RAW,
                                 thread_id=thread_id,
                                 run_id=run_id,
-                                event={"type": "system_log", "level": "debug", "message": str(text)}
+                                event={
+                                    "type": "system_log",
+                                    "level": "debug",
+                                    "message": text if isinstance(text, str) else str(text),
+                                }
                             )
 
-                    elif isinstance(message, ResultMessage):
-                        usage_raw = getattr(message, 'usage', None)
-                        sdk_num_turns = getattr(message, 'num_turns', None)
+                    elif message_type is ResultMessage:
+                        usage_raw = message.usage
+                        sdk_num_turns = message.num_turns
 
-                        logger.info(f"ResultMessage: num_turns={sdk_num_turns}, usage={usage_raw}")
+                        logger.info("ResultMessage: num_turns=%s, usage=%s", sdk_num_turns, usage_raw)
 
-                        # Convert usage object to dict if needed
+                        # Convert usage object to dict if needed (the SDK normally sends a dict)
                         if usage_raw is not None and not isinstance(usage_raw, dict):
                             try:
-                                if hasattr(usage_raw, '__dict__'):
-                                    usage_raw = usage_raw.__dict__
-                                elif hasattr(usage_raw, 'model_dump'):
-                                    usage_raw = usage_raw.model_dump()
+                                usage_raw = _usage_to_dict(usage_raw)
                             except Exception as e:
-                                logger.warning(f"Could not convert usage object to dict: {e}")
+                                logger.warning("Could not convert usage object to dict: %s", e)
 
                         # Update turn count
                         if sdk_num_turns is not None and sdk_num_turns > self._turn_count:
@@ -696,15 +936,8 @@ class ClaudeCodeAdapter:
                             obs.end_turn(self._turn_count, current_message, usage_raw if isinstance(usage_raw, dict) else None)
                             current_message = None
 
-                        result_payload = {
-                            "subtype": getattr(message, 'subtype', None),
-                            "duration_ms": getattr(message, 'duration_ms', None),
-                            "is_error": getattr(message, 'is_error', None),
-                            "num_turns": getattr(message, 'num_turns', None),
-                            "total_cost_usd": getattr(message, 'total_cost_usd', None),
-                            "usage": usage_raw,
-                            "result": getattr(message, 'result', None),
-                        }
+                        result_payload = dict(zip(_RESULT_FIELDS, _get_result_fields(message)))
+                        result_payload["usage"] = usage_raw
 
                         # Emit state delta with result
                         yield StateDeltaEvent(
@@ -725,22 +958,27 @@ class ClaudeCodeAdapter:
 
                 # Mark first run complete
                 self._first_run = False
+                run_succeeded = True
 
             finally:
                 # Clear active client reference (interrupt no longer valid for this run)
                 self._active_client = None
                 
-                # Always disconnect client at end of run (no persistence)
+                # Always disconnect client at end of run (no persistence); on success the
+                # observability flush runs alongside the subprocess shutdown
+                shutdown = []
                 if client is not None:
                     logger.info("Disconnecting client (end of run)")
-                    await client.disconnect()
-            
-            # Finalize observability
-            await obs.finalize()
+                    shutdown.append(client.disconnect())
+                if run_succeeded:
+                    shutdown.append(obs.finalize())
+                for result in await asyncio.gather(*shutdown, return_exceptions=True):
+                    if isinstance(result, BaseException):
+                        raise result
 
         except Exception as e:
-            logger.error(f"Failed to run Claude Code SDK: {e}")
-            if 'obs' in locals():
+            logger.error("Failed to run Claude Code SDK: %s", e)
+            if obs is not None:
                 await obs.cleanup_on_error(e)
             raise
     
@@ -757,91 +995,79 @@ class ClaudeCodeAdapter:
             await self._active_client.interrupt()
             logger.info("Interrupt signal sent successfully")
         except Exception as e:
-            logger.error(f"Failed to interrupt Claude SDK: {e}")
+            logger.error("Failed to interrupt Claude SDK: %s", e)
 
 
     def _setup_workflow_paths(self, active_workflow_url: str, repos_cfg: list) -> tuple[str, list, str]:
         """Setup paths for workflow mode."""
+        ws = self.context.workspace_path
         add_dirs = []
         derived_name = None
-        cwd_path = self.context.workspace_path
+        cwd_path = ws
 
         try:
-            owner, repo, _ = self._parse_owner_repo(active_workflow_url)
-            derived_name = repo or ''
-            if not derived_name:
-                p = urlparse(active_workflow_url)
-                parts = [pt for pt in (p.path or '').split('/') if pt]
-                if parts:
-                    derived_name = parts[-1]
-            derived_name = (derived_name or '').removesuffix('.git').strip()
+            derived_name = _derive_repo_name(active_workflow_url)
 
             if derived_name:
-                workflow_path = str(Path(self.context.workspace_path) / "workflows" / derived_name)
-                if Path(workflow_path).exists():
+                workflow_path = os.path.join(ws, "workflows", derived_name)
+                if os.path.isdir(workflow_path):
                     cwd_path = workflow_path
-                    logger.info(f"Using workflow as CWD: {derived_name}")
+                    logger.info("Using workflow as CWD: %s", derived_name)
                 else:
-                    logger.warning(f"Workflow directory not found: {workflow_path}, using default")
-                    cwd_path = str(Path(self.context.workspace_path) / "workflows" / "default")
+                    logger.warning("Workflow directory not found: %s, using default", workflow_path)
+                    cwd_path = os.path.join(ws, "workflows", "default")
             else:
-                cwd_path = str(Path(self.context.workspace_path) / "workflows" / "default")
+                cwd_path = os.path.join(ws, "workflows", "default")
         except Exception as e:
-            logger.warning(f"Failed to derive workflow name: {e}, using default")
-            cwd_path = str(Path(self.context.workspace_path) / "workflows" / "default")
+            logger.warning("Failed to derive workflow name: %s, using default", e)
+            cwd_path = os.path.join(ws, "workflows", "default")
 
         # Add all repos as additional directories
+        add_dirs_seen = set()
         for r in repos_cfg:
-            name = (r.get('name') or '').strip()
-            if name:
-                repo_path = str(Path(self.context.workspace_path) / name)
-                if repo_path not in add_dirs:
-                    add_dirs.append(repo_path)
+            repo_path = os.path.join(ws, r['name'])
+            if repo_path not in add_dirs_seen:
+                add_dirs_seen.add(repo_path)
+                add_dirs.append(repo_path)
 
         # Add artifacts and file-uploads directories
-        artifacts_path = str(Path(self.context.workspace_path) / "artifacts")
-        if artifacts_path not in add_dirs:
-            add_dirs.append(artifacts_path)
-
-        file_uploads_path = str(Path(self.context.workspace_path) / "file-uploads")
-        if file_uploads_path not in add_dirs:
-            add_dirs.append(file_uploads_path)
+        for extra_path in (os.path.join(ws, "artifacts"), os.path.join(ws, "file-uploads")):
+            if extra_path not in add_dirs_seen:
+                add_dirs_seen.add(extra_path)
+                add_dirs.append(extra_path)
 
         return cwd_path, add_dirs, derived_name
 
     def _setup_multi_repo_paths(self, repos_cfg: list) -> tuple[str, list]:
         """Setup paths for multi-repo mode."""
+        ws = self.context.workspace_path
         add_dirs = []
         
-        main_name = (os.getenv('MAIN_REPO_NAME') or '').strip()
+        main_name = (self.context.get_env('MAIN_REPO_NAME') or '').strip()
         if not main_name:
-            idx_raw = (os.getenv('MAIN_REPO_INDEX') or '').strip()
+            idx_raw = (self.context.get_env('MAIN_REPO_INDEX') or '').strip()
             try:
                 idx_val = int(idx_raw) if idx_raw else 0
             except Exception:
                 idx_val = 0
             if idx_val < 0 or idx_val >= len(repos_cfg):
                 idx_val = 0
-            main_name = (repos_cfg[idx_val].get('name') or '').strip()
+            main_name = repos_cfg[idx_val]['name']
 
-        cwd_path = str(Path(self.context.workspace_path) / main_name) if main_name else self.context.workspace_path
+        cwd_path = os.path.join(ws, main_name) if main_name else ws
 
+        add_dirs_seen = set()
         for r in repos_cfg:
-            name = (r.get('name') or '').strip()
-            if not name:
-                continue
-            p = str(Path(self.context.workspace_path) / name)
+            p = os.path.join(ws, r['name'])
             if p != cwd_path:
+                add_dirs_seen.add(p)
                 add_dirs.append(p)
 
         # Add artifacts and file-uploads directories
-        artifacts_path = str(Path(self.context.workspace_path) / "artifacts")
-        if artifacts_path not in add_dirs:
-            add_dirs.append(artifacts_path)
-
-        file_uploads_path = str(Path(self.context.workspace_path) / "file-uploads")
-        if file_uploads_path not in add_dirs:
-            add_dirs.append(file_uploads_path)
+        for extra_path in (os.path.join(ws, "artifacts"), os.path.join(ws, "file-uploads")):
+            if extra_path not in add_dirs_seen:
+                add_dirs_seen.add(extra_path)
+                add_dirs.append(extra_path)
 
         return cwd_path, add_dirs
 
@@ -852,27 +1078,21 @@ class ClaudeCodeAdapter:
             user_id = str(user_id).strip()
             if len(user_id) > 255:
                 user_id = user_id[:255]
-            sanitized_id = re.sub(r'[^a-zA-Z0-9@._-]', '', user_id)
+            sanitized_id = _USER_ID_DISALLOWED_RE.sub('', user_id)
             user_id = sanitized_id
 
         if user_name:
             user_name = str(user_name).strip()
             if len(user_name) > 255:
                 user_name = user_name[:255]
-            sanitized_name = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', user_name)
+            sanitized_name = user_name.translate(_CONTROL_CHARS_TABLE)
             user_name = sanitized_name
 
         return user_id, user_name
 
     def _map_to_vertex_model(self, model: str) -> str:
         """Map Anthropic API model names to Vertex AI model names."""
-        model_map = {
-            'claude-opus-4-5': 'claude-opus-4-5@20251101',
-            'claude-opus-4-1': 'claude-opus-4-1@20250805',
-            'claude-sonnet-4-5': 'claude-sonnet-4-5@20250929',
-            'claude-haiku-4-5': 'claude-haiku-4-5@20251001',
-        }
-        return model_map.get(model, model)
+        return _VERTEX_MODEL_MAP.get(model, model)
 
     async def _setup_vertex_credentials(self) -> dict:
         """Set up Google Cloud Vertex AI credentials from service account."""
@@ -890,7 +1110,7 @@ class ClaudeCodeAdapter:
         if not Path(service_account_path).exists():
             raise RuntimeError(f"Service account key file not found at {service_account_path}")
 
-        logger.info(f"Vertex AI configured: project={project_id}, region={region}")
+        logger.info("Vertex AI configured: project=%s, region=%s", project_id, region)
         return {
             'credentials_path': service_account_path,
             'project_id': project_id,
@@ -903,9 +1123,11 @@ class ClaudeCodeAdapter:
         workspace.mkdir(parents=True, exist_ok=True)
 
         parent_session_id = self.context.get_env('PARENT_SESSION_ID', '').strip()
-        reusing_workspace = bool(parent_session_id)
+        # Re-preparing in the same process (repo or workflow change) must not reset
+        # checkouts the ongoing conversation has already edited
+        reusing_workspace = bool(parent_session_id) or self._workspace_prepared
 
-        logger.info(f"Workspace preparation: parent_session_id={parent_session_id[:8] if parent_session_id else 'None'}, reusing={reusing_workspace}")
+        logger.info("Workspace preparation: parent_session_id=%s, reusing=%s", parent_session_id[:8] if parent_session_id else 'None', reusing_workspace)
 
         repos_cfg = self._get_repos_config()
         if repos_cfg:
@@ -914,15 +1136,16 @@ class ClaudeCodeAdapter:
             return
 
         # Single-repo legacy flow
-        input_repo = os.getenv("INPUT_REPO_URL", "").strip()
+        input_repo = self.context.get_env("INPUT_REPO_URL", "").strip()
         if not input_repo:
             logger.info("No INPUT_REPO_URL configured, skipping single-repo setup")
             return
 
-        input_branch = os.getenv("INPUT_BRANCH", "").strip() or "main"
-        output_repo = os.getenv("OUTPUT_REPO_URL", "").strip()
+        input_branch = self.context.get_env("INPUT_BRANCH", "").strip() or "main"
+        output_repo = self.context.get_env("OUTPUT_REPO_URL", "").strip()
 
         token = await self._fetch_token_for_url(input_repo)
+        authed_url = self._url_with_token(input_repo, token) if token else input_repo
         workspace_has_git = (workspace / ".git").exists()
 
         try:
@@ -933,9 +1156,9 @@ class ClaudeCodeAdapter:
                     run_id=self._current_run_id or "init",
                     event={"type": "system_log", "message": "📥 Cloning input repository..."}
                 )
-                clone_url = self._url_with_token(input_repo, token) if token else input_repo
-                await self._run_cmd(["git", "clone", "--branch", input_branch, "--single-branch", clone_url, str(workspace)], cwd=str(workspace.parent))
-                await self._run_cmd(["git", "remote", "set-url", "origin", clone_url], cwd=str(workspace), ignore_errors=True)
+                out_url = (self._url_with_token(output_repo, token) if token else output_repo) if output_repo else ""
+                # Identity and output remote are written at clone time, so no follow-up config calls are needed
+                await self._run_cmd(self._git_clone_args(authed_url, input_branch, workspace, partial=self._partial_clone_enabled(), extra=self._clone_config_args(out_url)), cwd=str(workspace.parent))
             elif reusing_workspace:
                 yield RawEvent(
                     type=EventType.RAW,
@@ -943,7 +1166,7 @@ class ClaudeCodeAdapter:
                     run_id=self._current_run_id or "init",
                     event={"type": "system_log", "message": "✓ Preserving workspace (continuation)"}
                 )
-                await self._run_cmd(["git", "remote", "set-url", "origin", self._url_with_token(input_repo, token) if token else input_repo], cwd=str(workspace), ignore_errors=True)
+                await self._run_cmd(["git", "remote", "set-url", "origin", authed_url], cwd=str(workspace), ignore_errors=True)
             else:
                 yield RawEvent(
                     type=EventType.RAW,
@@ -951,24 +1174,13 @@ class ClaudeCodeAdapter:
                     run_id=self._current_run_id or "init",
                     event={"type": "system_log", "message": "🔄 Resetting workspace to clean state"}
                 )
-                await self._run_cmd(["git", "remote", "set-url", "origin", self._url_with_token(input_repo, token) if token else input_repo], cwd=str(workspace))
-                await self._run_cmd(["git", "fetch", "origin", input_branch], cwd=str(workspace))
-                await self._run_cmd(["git", "checkout", input_branch], cwd=str(workspace))
-                await self._run_cmd(["git", "reset", "--hard", f"origin/{input_branch}"], cwd=str(workspace))
-
-            # Git identity
-            user_name = os.getenv("GIT_USER_NAME", "").strip() or "Ambient Code Bot"
-            user_email = os.getenv("GIT_USER_EMAIL", "").strip() or "bot@ambient-code.local"
-            await self._run_cmd(["git", "config", "user.name", user_name], cwd=str(workspace))
-            await self._run_cmd(["git", "config", "user.email", user_email], cwd=str(workspace))
-
-            if output_repo:
-                out_url = self._url_with_token(output_repo, token) if token else output_repo
-                await self._run_cmd(["git", "remote", "remove", "output"], cwd=str(workspace), ignore_errors=True)
-                await self._run_cmd(["git", "remote", "add", "output", out_url], cwd=str(workspace))
+                await self._git_reset_to(workspace, authed_url, input_branch)
+
+            if workspace_has_git:
+                await self._configure_existing_repo(workspace, output_repo, token)
 
         except Exception as e:
-            logger.error(f"Failed to prepare workspace: {e}")
+            logger.error("Failed to prepare workspace: %s", e)
             yield RawEvent(
                 type=EventType.RAW,
                 thread_id=self._current_thread_id or self.context.session_id,
@@ -981,77 +1193,150 @@ class ClaudeCodeAdapter:
             artifacts_dir = workspace / "artifacts"
             artifacts_dir.mkdir(parents=True, exist_ok=True)
         except Exception as e:
-            logger.warning(f"Failed to create artifacts directory: {e}")
+            logger.warning("Failed to create artifacts directory: %s", e)
 
     async def _prepare_multi_repo_workspace(
         self, workspace: Path, repos_cfg: list, reusing_workspace: bool
     ) -> AsyncIterator[BaseEvent]:
-        """Prepare workspace for multi-repo mode."""
+        """Prepare workspace for multi-repo mode.
+
+        Repos are cloned/reset concurrently (bounded by CLONE_CONCURRENCY) since
+        each one is dominated by network wait on the remote.
+        """
         try:
-            for r in repos_cfg:
-                name = (r.get('name') or '').strip()
-                inp = r.get('input') or {}
-                url = (inp.get('url') or '').strip()
-                branch = (inp.get('branch') or '').strip() or 'main'
-                if not name or not url:
-                    continue
-
-                repo_dir = workspace / name
-                token = await self._fetch_token_for_url(url)
-                repo_exists = repo_dir.exists() and (repo_dir / ".git").exists()
-
-                if not repo_exists:
-                    yield RawEvent(
-                        type=EventType.RAW,
-                        thread_id=self._current_thread_id or self.context.session_id,
-                        run_id=self._current_run_id or "init",
-                        event={"type": "system_log", "message": f"📥 Cloning {name}..."}
-                    )
-                    clone_url = self._url_with_token(url, token) if token else url
-                    await self._run_cmd(["git", "clone", "--branch", branch, "--single-branch", clone_url, str(repo_dir)], cwd=str(workspace))
-                    await self._run_cmd(["git", "remote", "set-url", "origin", clone_url], cwd=str(repo_dir), ignore_errors=True)
-                elif reusing_workspace:
-                    yield RawEvent(
-                        type=EventType.RAW,
-                        thread_id=self._current_thread_id or self.context.session_id,
-                        run_id=self._current_run_id or "init",
-                        event={"type": "system_log", "message": f"✓ Preserving {name} (continuation)"}
-                    )
-                    await self._run_cmd(["git", "remote", "set-url", "origin", self._url_with_token(url, token) if token else url], cwd=str(repo_dir), ignore_errors=True)
-                else:
-                    yield RawEvent(
-                        type=EventType.RAW,
-                        thread_id=self._current_thread_id or self.context.session_id,
-                        run_id=self._current_run_id or "init",
-                        event={"type": "system_log", "message": f"🔄 Resetting {name} to clean state"}
-                    )
-                    await self._run_cmd(["git", "remote", "set-url", "origin", self._url_with_token(url, token) if token else url], cwd=str(repo_dir), ignore_errors=True)
-                    await self._run_cmd(["git", "fetch", "origin", branch], cwd=str(repo_dir))
-                    await self._run_cmd(["git", "checkout", branch], cwd=str(repo_dir))
-                    await self._run_cmd(["git", "reset", "--hard", f"origin/{branch}"], cwd=str(repo_dir))
-
-                # Git identity
-                user_name = os.getenv("GIT_USER_NAME", "").strip() or "Ambient Code Bot"
-                user_email = os.getenv("GIT_USER_EMAIL", "").strip() or "bot@ambient-code.local"
-                await self._run_cmd(["git", "config", "user.name", user_name], cwd=str(repo_dir))
-                await self._run_cmd(["git", "config", "user.email", user_email], cwd=str(repo_dir))
-
-                # Configure output remote
-                out = r.get('output') or {}
-                out_url_raw = (out.get('url') or '').strip()
-                if out_url_raw:
-                    out_url = self._url_with_token(out_url_raw, token) if token else out_url_raw
-                    await self._run_cmd(["git", "remote", "remove", "output"], cwd=str(repo_dir), ignore_errors=True)
-                    await self._run_cmd(["git", "remote", "add", "output", out_url], cwd=str(repo_dir))
+            sem = asyncio.Semaphore(max(1, int(self.context.get_env("CLONE_CONCURRENCY", "4") or 4)))
+        except ValueError:
+            sem = asyncio.Semaphore(4)
 
-        except Exception as e:
-            logger.error(f"Failed to prepare multi-repo workspace: {e}")
+        names: list[str] = []
+        jobs = []
+        for r in repos_cfg:
+            name = r['name']
+            repo_exists = os.path.exists(os.path.join(workspace, name, ".git"))
+            if not repo_exists:
+                message = f"📥 Cloning {name}..."
+            elif reusing_workspace:
+                message = f"✓ Preserving {name} (continuation)"
+            else:
+                message = f"🔄 Resetting {name} to clean state"
             yield RawEvent(
                 type=EventType.RAW,
                 thread_id=self._current_thread_id or self.context.session_id,
                 run_id=self._current_run_id or "init",
-                event={"type": "system_log", "message": f"Workspace preparation failed: {e}"}
+                event={"type": "system_log", "message": message}
             )
+            names.append(name)
+            jobs.append(self._prepare_one_repo(r, workspace, repo_exists, reusing_workspace, sem))
+
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException):
+                logger.error("Failed to prepare repo %s: %s", name, result)
+                yield RawEvent(
+                    type=EventType.RAW,
+                    thread_id=self._current_thread_id or self.context.session_id,
+                    run_id=self._current_run_id or "init",
+                    event={"type": "system_log", "message": f"Workspace preparation failed for {name}: {result}"}
+                )
+
+    async def _prepare_one_repo(
+        self, r: dict, workspace: Path, repo_exists: bool, reusing_workspace: bool, sem: asyncio.Semaphore
+    ) -> None:
+        """Clone, preserve, or reset a single repo from the multi-repo config.
+
+        repo_exists is the caller's .git probe, reused so each repo is stat'ed once.
+        """
+        name = r['name']
+        url = r['input']['url']
+        branch = r['input']['branch']
+        out_url_raw = _str_field(r['output'] or {}, 'url')
+        repo_dir = workspace / name
+
+        async with sem:
+            token = await self._fetch_token_for_url(url)
+            authed_url = self._url_with_token(url, token) if token else url
+
+            if not repo_exists:
+                out_url = (self._url_with_token(out_url_raw, token) if token else out_url_raw) if out_url_raw else ""
+                await self._run_cmd(self._git_clone_args(authed_url, branch, repo_dir, partial=self._partial_clone_enabled(r.get('partialClone')), extra=self._clone_config_args(out_url)), cwd=str(workspace))
+                return
+
+            if reusing_workspace:
+                await self._run_cmd(["git", "remote", "set-url", "origin", authed_url], cwd=str(repo_dir), ignore_errors=True)
+            else:
+                await self._git_reset_to(repo_dir, authed_url, branch)
+
+            await self._configure_existing_repo(repo_dir, out_url_raw, token)
+
+    async def _git_reset_to(self, repo_dir: Path, remote_url: str, branch: str) -> None:
+        """Point origin at remote_url and hard-reset repo_dir to origin/branch.
+
+        The four git steps run in one shell so a reset costs a single subprocess spawn.
+        A failed set-url is tolerated, as before; the fetch/checkout/reset are fatal.
+        """
+        script = (
+            'set -e; '
+            'git remote set-url origin "$1" || true; '
+            'git fetch origin "$2"; '
+            'git checkout "$2"; '
+            'git reset --hard "origin/$2"'
+        )
+        await self._run_cmd(["sh", "-c", script, "git-reset", remote_url, branch], cwd=str(repo_dir))
+
+    @staticmethod
+    def _git_clone_args(
+        url: str, branch: str, dest: Path, shallow: bool = False, partial: bool = False, extra: Optional[list[str]] = None
+    ) -> list[str]:
+        """Build a single-branch `git clone` command.
+
+        shallow fetches only the tip commit (read-only checkouts). partial keeps full
+        history but defers blob downloads (--filter=blob:none), which stays safe to
+        commit and push from.
+        """
+        cmd = ["git", "clone", *(extra or ()), "--branch", branch, "--single-branch"]
+        if shallow:
+            cmd.append("--depth=1")
+        elif partial:
+            cmd.append("--filter=blob:none")
+        return [*cmd, url, str(dest)]
+
+    def _partial_clone_enabled(self, override: Optional[bool] = None) -> bool:
+        """Whether input repos are cloned blobless (per-repo override, else INPUT_PARTIAL_CLONE).
+
+        Off by default: blobless clones fetch file contents on demand through origin,
+        whose short-lived token can expire mid-session and break blame/log -p/diffs.
+        """
+        if override is not None:
+            return override
+        return self.context.get_env("INPUT_PARTIAL_CLONE", "").strip().lower() in ("1", "true", "yes")
+
+    def _git_identity(self) -> tuple[str, str]:
+        """Return the (name, email) pair used for commits made in the workspace."""
+        user_name = self.context.get_env("GIT_USER_NAME", "").strip() or "Ambient Code Bot"
+        user_email = self.context.get_env("GIT_USER_EMAIL", "").strip() or "bot@ambient-code.local"
+        return user_name, user_email
+
+    def _clone_config_args(self, out_url: str = "") -> list[str]:
+        """Build `git clone -c` options that write identity and the output remote into the new repo."""
+        user_name, user_email = self._git_identity()
+        args = ["-c", f"user.name={user_name}", "-c", f"user.email={user_email}"]
+        if out_url:
+            args += [
+                "-c", f"remote.output.url={out_url}",
+                "-c", "remote.output.fetch=+refs/heads/*:refs/remotes/output/*",
+            ]
+        return args
+
+    async def _configure_existing_repo(self, repo_dir: Path, output_repo: str, token: str) -> None:
+        """Apply git identity and the output remote to a repo that was not freshly cloned."""
+        user_name, user_email = self._git_identity()
+        await self._run_cmd(["git", "config", "user.name", user_name], cwd=str(repo_dir))
+        await self._run_cmd(["git", "config", "user.email", user_email], cwd=str(repo_dir))
+
+        if output_repo:
+            out_url = self._url_with_token(output_repo, token) if token else output_repo
+            await self._run_cmd(["git", "remote", "remove", "output"], cwd=str(repo_dir), ignore_errors=True)
+            await self._run_cmd(["git", "remote", "add", "output", out_url], cwd=str(repo_dir))
 
     async def _validate_prerequisites(self):
         """Validate prerequisite files exist for phase-based slash commands."""
@@ -1076,10 +1361,8 @@ class ClaudeCodeAdapter:
                     found = True
                     break
 
-                for subdir in workspace.rglob("specs/*/"):
-                    if (subdir / required_file).exists():
-                        found = True
-                        break
+                if _find_specs_file(workspace, required_file):
+                    found = True
 
                 if not found:
                     raise PrerequisiteError(error_msg)
@@ -1095,14 +1378,7 @@ class ClaudeCodeAdapter:
         active_workflow_path = (os.getenv('ACTIVE_WORKFLOW_PATH') or '').strip()
 
         try:
-            owner, repo, _ = self._parse_owner_repo(active_workflow_url)
-            derived_name = repo or ''
-            if not derived_name:
-                p = urlparse(active_workflow_url)
-                parts = [pt for pt in (p.path or '').split('/') if pt]
-                if parts:
-                    derived_name = parts[-1]
-            derived_name = (derived_name or '').removesuffix('.git').strip()
+            derived_name = _derive_repo_name(active_workflow_url)
 
             if not derived_name:
                 logger.warning("Could not derive workflow name from URL, skipping initialization")
@@ -1111,15 +1387,15 @@ class ClaudeCodeAdapter:
             workflow_dir = Path(self.context.workspace_path) / "workflows" / derived_name
 
             if workflow_dir.exists():
-                logger.info(f"Workflow {derived_name} already exists, skipping initialization")
+                logger.info("Workflow %s already exists, skipping initialization", derived_name)
                 return
 
-            logger.info(f"Initializing workflow {derived_name} from CR spec on startup")
+            logger.info("Initializing workflow %s from CR spec on startup", derived_name)
             async for event in self._clone_workflow_repository(active_workflow_url, active_workflow_branch, active_workflow_path, derived_name):
                 yield event
 
         except Exception as e:
-            logger.error(f"Failed to initialize workflow on startup: {e}")
+            logger.error("Failed to initialize workflow on startup: %s", e)
 
     async def _clone_workflow_repository(
         self, git_url: str, branch: str, path: str, workflow_name: str
@@ -1148,13 +1424,18 @@ class ClaudeCodeAdapter:
         )
 
         clone_url = self._url_with_token(git_url, token) if token else git_url
-        await self._run_cmd(["git", "clone", "--branch", branch, "--single-branch", clone_url, str(temp_clone_dir)], cwd=str(workspace))
+        # Workflows are only read, so the tip commit is all that is needed
+        await self._run_cmd(self._git_clone_args(clone_url, branch, temp_clone_dir, shallow=True), cwd=str(workspace))
 
         if path and path.strip():
             subdir_path = temp_clone_dir / path.strip()
-            if subdir_path.exists() and subdir_path.is_dir():
-                shutil.copytree(subdir_path, workflow_dir)
-                shutil.rmtree(temp_clone_dir)
+            if subdir_path.is_dir():
+                # Same filesystem, so a rename moves the subtree without copying it
+                try:
+                    subdir_path.rename(workflow_dir)
+                except OSError:
+                    await asyncio.to_thread(shutil.copytree, subdir_path, workflow_dir)
+                self._discard_dir(temp_clone_dir)
                 yield RawEvent(
                     type=EventType.RAW,
                     thread_id=self._current_thread_id or self.context.session_id,
@@ -1179,108 +1460,165 @@ class ClaudeCodeAdapter:
             event={"type": "system_log", "message": f"✅ Workflow {workflow_name} ready"}
         )
 
+    def _discard_dir(self, path: Path) -> None:
+        """Remove a directory tree without blocking the event loop.
+
+        The tree is renamed to a unique hidden name right away (so its path can be
+        reused immediately) and deleted in a worker thread in the background;
+        close() waits for any deletion still in flight.
+        """
+        trash = path.with_name(f".trash-{path.name}-{uuid.uuid4().hex[:8]}")
+        try:
+            path.rename(trash)
+        except OSError:
+            trash = path
+        task = asyncio.create_task(asyncio.to_thread(shutil.rmtree, trash, ignore_errors=True))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
     async def _run_cmd(self, cmd, cwd=None, capture_stdout=False, ignore_errors=False):
         """Run a subprocess command asynchronously."""
-        cmd_safe = [self._redact_secrets(str(arg)) for arg in cmd]
-        logger.info(f"Running command: {' '.join(cmd_safe)}")
+        # Redacting every argument and the output is only worth it if it gets logged
+        log_info = logger.isEnabledFor(logging.INFO)
+        if log_info:
+            logger.info("Running command: %s", self._format_cmd(cmd))
 
+        # Nobody reads stdout unless it is captured or logged; let the kernel discard it
+        keep_stdout = capture_stdout or log_info
         proc = await asyncio.create_subprocess_exec(
             *cmd,
-            stdout=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE if keep_stdout else asyncio.subprocess.DEVNULL,
             stderr=asyncio.subprocess.PIPE,
             cwd=cwd or self.context.workspace_path,
         )
         stdout_data, stderr_data = await proc.communicate()
-        stdout_text = stdout_data.decode("utf-8", errors="replace")
+        stdout_text = stdout_data.decode("utf-8", errors="replace") if stdout_data else ""
         stderr_text = stderr_data.decode("utf-8", errors="replace")
 
-        if stdout_text.strip():
-            logger.info(f"Command stdout: {self._redact_secrets(stdout_text.strip())}")
-        if stderr_text.strip():
-            logger.info(f"Command stderr: {self._redact_secrets(stderr_text.strip())}")
+        if log_info:
+            stdout_stripped = stdout_text.strip()
+            if stdout_stripped:
+                logger.info("Command stdout: %s", self._redact_secrets(stdout_stripped))
+            stderr_stripped = stderr_text.strip()
+            if stderr_stripped:
+                logger.info("Command stderr: %s", self._redact_secrets(stderr_stripped))
 
         if proc.returncode != 0 and not ignore_errors:
-            raise RuntimeError(stderr_text or f"Command failed: {' '.join(cmd_safe)}")
+            raise RuntimeError(stderr_text or f"Command failed: {self._format_cmd(cmd)}")
 
         if capture_stdout:
             return stdout_text
         return ""
 
+    def _format_cmd(self, cmd) -> str:
+        """Render a command line for logging with secrets redacted."""
+        return shlex.join(self._redact_secrets(str(arg)) for arg in cmd)
+
     def _url_with_token(self, url: str, token: str) -> str:
         """Add authentication token to URL."""
         if not token or not url.lower().startswith("http"):
             return url
-        try:
-            parsed = urlparse(url)
-            netloc = parsed.netloc
-            if "@" in netloc:
-                netloc = netloc.split("@", 1)[1]
+        scheme, sep, rest = url.partition("://")
+        if not sep:
+            return url
 
-            hostname = parsed.hostname or ""
-            if 'gitlab' in hostname.lower():
-                auth = f"oauth2:{token}@"
-            else:
-                auth = f"x-access-token:{token}@"
+        # Splice the credentials into the authority, replacing any existing userinfo
+        netloc, slash, path = rest.partition("/")
+        if "@" in netloc:
+            netloc = netloc.split("@", 1)[1]
 
-            new_netloc = auth + netloc
-            return urlunparse((parsed.scheme, new_netloc, parsed.path,
-                               parsed.params, parsed.query, parsed.fragment))
-        except Exception:
-            return url
+        if 'gitlab' in netloc.lower():
+            auth = f"oauth2:{token}@"
+        else:
+            auth = f"x-access-token:{token}@"
+
+        return f"{scheme}://{auth}{netloc}{slash}{path}"
 
     def _redact_secrets(self, text: str) -> str:
         """Redact tokens and secrets from text for safe logging."""
-        if not text:
+        if not text or not any(hint in text for hint in _SECRET_HINTS):
             return text
 
-        text = re.sub(r'gh[pousr]_[a-zA-Z0-9]{36,255}', 'gh*_***REDACTED***', text)
-        text = re.sub(r'sk-ant-[a-zA-Z0-9\-_]{30,200}', 'sk-ant-***REDACTED***', text)
-        text = re.sub(r'pk-lf-[a-zA-Z0-9\-_]{10,100}', 'pk-lf-***REDACTED***', text)
-        text = re.sub(r'sk-lf-[a-zA-Z0-9\-_]{10,100}', 'sk-lf-***REDACTED***', text)
-        text = re.sub(r'x-access-token:[^@\s]+@', 'x-access-token:***REDACTED***@', text)
-        text = re.sub(r'oauth2:[^@\s]+@', 'oauth2:***REDACTED***@', text)
-        text = re.sub(r'://[^:@\s]+:[^@\s]+@', '://***REDACTED***@', text)
-        text = re.sub(
-            r'(ANTHROPIC_API_KEY|LANGFUSE_SECRET_KEY|LANGFUSE_PUBLIC_KEY|BOT_TOKEN|GIT_TOKEN)\s*=\s*[^\s\'"]+',
-            r'\1=***REDACTED***',
-            text
-        )
-        return text
+        return _SECRET_RE.sub(_redact_match, text)
 
     async def _fetch_token_for_url(self, url: str) -> str:
-        """Fetch appropriate token based on repository URL."""
+        """Fetch appropriate token based on repository URL, cached per host.
+
+        Minted tokens are short-lived, so entries expire after
+        _TOKEN_CACHE_TTL_SECONDS and empty results are never cached.
+        """
+        host = urlparse(url).netloc.rpartition("@")[2].lower()
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+
+        cached = self._token_cache.get(host)
+        if cached is not None and cached[0] > now:
+            return await asyncio.shield(cached[1])
+
+        fut = loop.create_future()
+        self._token_cache[host] = (now + _TOKEN_CACHE_TTL_SECONDS, fut)
+        try:
+            token = await self._resolve_token_for_url(url)
+        except BaseException as e:
+            self._token_cache.pop(host, None)
+            fut.set_exception(e)
+            # Mark retrieved so waiter-less failures don't log "never retrieved"
+            fut.exception()
+            raise
+        if not token:
+            self._token_cache.pop(host, None)
+        fut.set_result(token)
+        return token
+
+    async def _resolve_token_for_url(self, url: str) -> str:
+        """Look up the token for a repository URL without caching."""
         try:
             parsed = urlparse(url)
             hostname = parsed.hostname or ""
 
             if 'gitlab' in hostname.lower():
-                token = os.getenv("GITLAB_TOKEN", "").strip()
+                token = self.context.get_env("GITLAB_TOKEN", "").strip()
                 if token:
-                    logger.info(f"Using GITLAB_TOKEN for {hostname}")
+                    logger.info("Using GITLAB_TOKEN for %s", hostname)
                     return token
                 else:
-                    logger.warning(f"No GITLAB_TOKEN found for GitLab URL: {url}")
+                    logger.warning("No GITLAB_TOKEN found for GitLab URL: %s", url)
                     return ""
 
-            token = os.getenv("GITHUB_TOKEN") or await self._fetch_github_token()
+            token = self.context.get_env("GITHUB_TOKEN") or await self._fetch_github_token()
             if token:
-                logger.info(f"Using GitHub token for {hostname}")
+                logger.info("Using GitHub token for %s", hostname)
             return token
 
         except Exception as e:
-            logger.warning(f"Failed to parse URL {url}: {e}, falling back to GitHub token")
-            return os.getenv("GITHUB_TOKEN") or await self._fetch_github_token()
+            logger.warning("Failed to parse URL %s: %s, falling back to GitHub token", url, e)
+            return self.context.get_env("GITHUB_TOKEN") or await self._fetch_github_token()
+
+    def _get_http_session(self) -> aiohttp.ClientSession:
+        """Return the shared backend HTTP session, creating it on first use."""
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+        return self._http_session
+
+    async def close(self) -> None:
+        """Release resources held across runs; called on server shutdown."""
+        # Let background deletions finish so no .trash-* dirs are left on the workspace volume
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        self._http_session = None
 
     async def _fetch_github_token(self) -> str:
         """Fetch GitHub token from backend API or environment."""
-        cached = os.getenv("GITHUB_TOKEN", "").strip()
+        cached = self.context.get_env("GITHUB_TOKEN", "").strip()
         if cached:
             logger.info("Using GITHUB_TOKEN from environment")
             return cached
 
         # Build mint URL from environment
-        base = os.getenv('BACKEND_API_URL', '').rstrip('/')
-        project = os.getenv('PROJECT_NAME', '').strip()
+        base = self.context.get_env('BACKEND_API_URL', '').rstrip('/')
+        project = self.context.get_env('PROJECT_NAME', '').strip()
         session_id = self.context.session_id
 
         if not base or not project or not session_id:
@@ -1288,120 +1626,122 @@ class ClaudeCodeAdapter:
             return ""
 
         url = f"{base}/projects/{project}/agentic-sessions/{session_id}/github/token"
-        logger.info(f"Fetching GitHub token from: {url}")
+        logger.info("Fetching GitHub token from: %s", url)
 
-        req = _urllib_request.Request(url, data=b"{}", headers={'Content-Type': 'application/json'}, method='POST')
-        bot = (os.getenv('BOT_TOKEN') or '').strip()
+        headers = {'Content-Type': 'application/json'}
+        bot = (self.context.get_env('BOT_TOKEN') or '').strip()
         if bot:
-            req.add_header('Authorization', f'Bearer {bot}')
-
-        loop = asyncio.get_event_loop()
+            headers['Authorization'] = f'Bearer {bot}'
 
-        def _do_req():
-            try:
-                with _urllib_request.urlopen(req, timeout=10) as resp:
-                    return resp.read().decode('utf-8', errors='replace')
-            except Exception as e:
-                logger.warning(f"GitHub token fetch failed: {e}")
-                return ''
+        # Native async request: no executor thread parked for the whole timeout
+        try:
+            async with self._get_http_session().post(url, data=b"{}", headers=headers) as resp:
+                resp_text = await resp.text(errors='replace')
+                if resp.status >= 400:
+                    logger.warning("GitHub token fetch failed: HTTP %s", resp.status)
+                    return ""
+        except Exception as e:
+            logger.warning("GitHub token fetch failed: %s", e)
+            return ""
 
-        resp_text = await loop.run_in_executor(None, _do_req)
         if not resp_text:
             return ""
 
         try:
-            data = _json.loads(resp_text)
-            token = str(data.get('token') or '')
+            data = orjson.loads(resp_text)
+            token = data.get('token') or ''
+            if not isinstance(token, str):
+                token = str(token)
             if token:
                 logger.info("Successfully fetched GitHub token from backend")
             return token
         except Exception as e:
-            logger.error(f"Failed to parse token response: {e}")
+            logger.error("Failed to parse token response: %s", e)
             return ""
 
     def _parse_owner_repo(self, url: str) -> tuple[str, str, str]:
         """Return (owner, name, host) from various URL formats."""
-        s = (url or "").strip()
-        s = s.removesuffix(".git")
-        host = "github.com"
-        try:
-            if s.startswith("http://") or s.startswith("https://"):
-                p = urlparse(s)
-                host = p.netloc
-                parts = [pt for pt in p.path.split("/") if pt]
-                if len(parts) >= 2:
-                    return parts[0], parts[1], host
-            if s.startswith("git@") or ":" in s:
-                s2 = s
-                if s2.startswith("git@"):
-                    s2 = s2.replace(":", "/", 1)
-                    s2 = s2.replace("git@", "ssh://git@", 1)
-                p = urlparse(s2)
-                host = p.hostname or host
-                parts = [pt for pt in (p.path or "").split("/") if pt]
-                if len(parts) >= 2:
-                    return parts[-2], parts[-1], host
-            parts = [pt for pt in s.split("/") if pt]
-            if len(parts) == 2:
-                return parts[0], parts[1], host
-        except Exception:
-            return "", "", host
-        return "", "", host
+        return _parse_owner_repo(url)
 
     def _get_repos_config(self) -> list[dict]:
-        """Read repos mapping from REPOS_JSON env if present."""
+        """Return the normalized repos mapping.
+
+        REPOS_JSON is parsed once; after that the /repos endpoints update the
+        in-memory list through add_repo/remove_repo instead of the environment.
+        """
+        if self._repos_cache is None:
+            self._repos_cache = self._parse_repos_config(os.getenv('REPOS_JSON', '').strip())
+        return self._repos_cache
+
+    def add_repo(self, entry: dict) -> None:
+        """Add a repo (REPOS_JSON entry shape) to the repos mapping."""
+        normalized = self._normalize_repo_entry(entry)
+        if normalized is None:
+            logger.warning("Ignoring repo entry without a usable name/url: %s", entry)
+            return
+        # Rebind instead of appending so a workspace setup iterating the old list is unaffected
+        self._repos_cache = [*self._get_repos_config(), normalized]
+
+    def remove_repo(self, name: str) -> None:
+        """Remove a repo from the repos mapping by name."""
+        self._repos_cache = [r for r in self._get_repos_config() if r['name'] != name]
+
+    def _parse_repos_config(self, raw: str) -> list[dict]:
+        """Parse and normalize a REPOS_JSON payload."""
         try:
-            raw = os.getenv('REPOS_JSON', '').strip()
             if not raw:
                 return []
-            data = _json.loads(raw)
+            data = orjson.loads(raw)
             if isinstance(data, list):
-                out = []
-                for it in data:
-                    if not isinstance(it, dict):
-                        continue
-                    name = str(it.get('name') or '').strip()
-                    input_obj = it.get('input') or {}
-                    output_obj = it.get('output') or None
-                    url = str((input_obj or {}).get('url') or '').strip()
-                    if not name and url:
-                        try:
-                            owner, repo, _ = self._parse_owner_repo(url)
-                            derived = repo or ''
-                            if not derived:
-                                p = urlparse(url)
-                                parts = [pt for pt in (p.path or '').split('/') if pt]
-                                if parts:
-                                    derived = parts[-1]
-                            name = (derived or '').removesuffix('.git').strip()
-                        except Exception:
-                            name = ''
-                    if name and isinstance(input_obj, dict) and url:
-                        out.append({'name': name, 'input': input_obj, 'output': output_obj})
-                return out
+                return [r for r in map(self._normalize_repo_entry, data) if r is not None]
         except Exception:
             return []
         return []
 
+    def _normalize_repo_entry(self, it: Any) -> Optional[dict]:
+        """Clean one REPOS_JSON entry, or return None if it has no usable name/url."""
+        if not isinstance(it, dict):
+            return None
+        name = _str_field(it, 'name')
+        input_obj = it.get('input') or {}
+        output_obj = it.get('output') or None
+        url = _str_field(input_obj, 'url') if isinstance(input_obj, dict) else ''
+        if not name and url:
+            try:
+                name = _derive_repo_name(url)
+            except Exception:
+                name = ''
+        if not (name and isinstance(input_obj, dict) and url):
+            return None
+        # Store cleaned name/url/branch so consumers can index without re-stripping
+        input_obj = {**input_obj, 'url': url, 'branch': _str_field(input_obj, 'branch', 'main')}
+        # Per-repo blobless clone opt-out; None defers to INPUT_PARTIAL_CLONE
+        partial_clone = it.get('partialClone')
+        return {
+            'name': name,
+            'input': input_obj,
+            'output': output_obj,
+            'partialClone': partial_clone if isinstance(partial_clone, bool) else None,
+        }
+
     def _load_mcp_config(self, cwd_path: str) -> Optional[dict]:
         """Load MCP server configuration from the ambient runner's .mcp.json file."""
         try:
             runner_mcp_file = Path("/app/claude-runner/.mcp.json")
 
-            if runner_mcp_file.exists() and runner_mcp_file.is_file():
-                logger.info(f"Loading MCP config from runner directory: {runner_mcp_file}")
-                with open(runner_mcp_file, 'r') as f:
-                    config = _json.load(f)
-                    return config.get('mcpServers', {})
+            if runner_mcp_file.is_file():
+                logger.info("Loading MCP config from runner directory: %s", runner_mcp_file)
+                config = orjson.loads(runner_mcp_file.read_bytes())
+                return config.get('mcpServers', {})
             else:
                 logger.info("No .mcp.json file found in runner directory")
                 return None
 
-        except _json.JSONDecodeError as e:
-            logger.error(f"Failed to parse .mcp.json: {e}")
+        except orjson.JSONDecodeError as e:
+            logger.error("Failed to parse .mcp.json: %s", e)
             return None
         except Exception as e:
-            logger.error(f"Error loading MCP config: {e}")
+            logger.error("Error loading MCP config: %s", e)
             return None
 
     def _load_ambient_config(self, cwd_path: str) -> dict:
@@ -1410,66 +1750,77 @@ class ClaudeCodeAdapter:
             config_path = Path(cwd_path) / ".ambient" / "ambient.json"
 
             if not config_path.exists():
-                logger.info(f"No ambient.json found at {config_path}, using defaults")
+                logger.info("No ambient.json found at %s, using defaults", config_path)
                 return {}
 
-            with open(config_path, 'r') as f:
-                config = _json.load(f)
-                logger.info(f"Loaded ambient.json: name={config.get('name')}")
-                return config
+            config = orjson.loads(config_path.read_bytes())
+            logger.info("Loaded ambient.json: name=%s", config.get('name'))
+            return config
 
-        except _json.JSONDecodeError as e:
-            logger.error(f"Failed to parse ambient.json: {e}")
+        except orjson.JSONDecodeError as e:
+            logger.error("Failed to parse ambient.json: %s", e)
             return {}
         except Exception as e:
-            logger.error(f"Error loading ambient.json: {e}")
+            logger.error("Error loading ambient.json: %s", e)
             return {}
 
     def _build_workspace_context_prompt(self, repos_cfg, workflow_name, artifacts_path, ambient_config):
-        """Generate comprehensive system prompt describing workspace layout."""
-        prompt = "You are Claude Code working in a structured development workspace.\n\n"
+        """Generate comprehensive system prompt describing workspace layout.
+
+        The result is memoized on its inputs, including the current listing of
+        file-uploads/, so consecutive runs with an unchanged workspace reuse it.
+        """
+        uploaded_files = self._list_uploaded_files()
+        repo_names = tuple(repo.get('name', f'repo-{i}') for i, repo in enumerate(repos_cfg or []))
+        cache_key = (repo_names, workflow_name, artifacts_path, ambient_config.get("systemPrompt"), uploaded_files)
+        if self._workspace_prompt_cache is not None and self._workspace_prompt_cache[0] == cache_key:
+            return self._workspace_prompt_cache[1]
+
+        parts: list[str] = ["You are Claude Code working in a structured development workspace.\n\n"]
 
         if workflow_name:
-            prompt += "## Current Workflow\n"
-            prompt += f"Working directory: workflows/{workflow_name}/\n"
-            prompt += "This directory contains workflow logic and automation scripts.\n\n"
+            parts.append("## Current Workflow\n")
+            parts.append(f"Working directory: workflows/{workflow_name}/\n")
+            parts.append("This directory contains workflow logic and automation scripts.\n\n")
 
-        prompt += "## User-Uploaded Files (IMPORTANT)\n"
-        prompt += "Location: file-uploads/\n"
-        prompt += "Purpose: User-uploaded context files (screenshots, documents, images, PDFs, specs, designs).\n"
-        prompt += "ALWAYS check this directory when starting a new task - it often contains critical context.\n\n"
+        parts.append("## User-Uploaded Files (IMPORTANT)\n")
+        parts.append("Location: file-uploads/\n")
+        parts.append("Purpose: User-uploaded context files (screenshots, documents, images, PDFs, specs, designs).\n")
+        parts.append("ALWAYS check this directory when starting a new task - it often contains critical context.\n\n")
 
-        file_uploads_path = Path(self.context.workspace_path) / "file-uploads"
-        if file_uploads_path.exists() and file_uploads_path.is_dir():
-            try:
-                files = sorted([f.name for f in file_uploads_path.iterdir() if f.is_file()])
-                if files:
-                    prompt += f"Currently uploaded files ({len(files)}):\n"
-                    for filename in files:
-                        prompt += f"  - {filename}\n"
-                    prompt += "READ THESE FILES if they're relevant to the user's task!\n"
-            except Exception:
-                pass
+        if uploaded_files:
+            parts.append(f"Currently uploaded files ({len(uploaded_files)}):\n")
+            parts.extend(f"  - {filename}\n" for filename in uploaded_files)
+            parts.append("READ THESE FILES if they're relevant to the user's task!\n")
 
-        prompt += "\n## Shared Artifacts Directory\n"
-        prompt += f"Location: {artifacts_path}\n"
-        prompt += "Purpose: Create all output artifacts (documents, specs, reports) here.\n\n"
+        parts.append("\n## Shared Artifacts Directory\n")
+        parts.append(f"Location: {artifacts_path}\n")
+        parts.append("Purpose: Create all output artifacts (documents, specs, reports) here.\n\n")
 
-        if repos_cfg:
-            prompt += "## Available Code Repositories\n"
-            for i, repo in enumerate(repos_cfg):
-                name = repo.get('name', f'repo-{i}')
-                prompt += f"- {name}/\n"
-            prompt += "\nThese repositories contain source code you can read or modify.\n\n"
+        if repo_names:
+            parts.append("## Available Code Repositories\n")
+            parts.extend(f"- {name}/\n" for name in repo_names)
+            parts.append("\nThese repositories contain source code you can read or modify.\n\n")
 
         if ambient_config.get("systemPrompt"):
-            prompt += f"## Workflow Instructions\n{ambient_config['systemPrompt']}\n\n"
+            parts.append(f"## Workflow Instructions\n{ambient_config['systemPrompt']}\n\n")
 
-        prompt += "## Navigation\n"
-        prompt += "All directories are accessible via relative or absolute paths.\n"
+        parts.append("## Navigation\n")
+        parts.append("All directories are accessible via relative or absolute paths.\n")
 
+        prompt = "".join(parts)
+        self._workspace_prompt_cache = (cache_key, prompt)
         return prompt
 
+    def _list_uploaded_files(self) -> tuple[str, ...]:
+        """Return the sorted names of files in the workspace file-uploads directory."""
+        file_uploads_path = Path(self.context.workspace_path) / "file-uploads"
+        if not file_uploads_path.is_dir():
+            return ()
+        try:
+            return tuple(sorted(f.name for f in file_uploads_path.iterdir() if f.is_file()))
+        except Exception:
+            return ()
 
     async def _setup_google_credentials(self):
         """Copy Google OAuth credentials from mounted Secret to writable workspace location.
@@ -4,7 +4,6 @@ Implements the official AG-UI server pattern.
 """
 import asyncio
 import os
-import json
 import logging
 from contextlib import asynccontextmanager
 from typing import Optional, List, Dict, Any, Union
@@ -52,7 +51,7 @@ class RunnerInput(BaseModel):
         # Generate runId if not provided
         if not run_id:
             run_id = str(uuid.uuid4())
-            logger.info(f"Generated run_id: {run_id}")
+            logger.info("Generated run_id: %s", run_id)
         
         # Context should be a list, not a dict
         context_list = self.context if isinstance(self.context, list) else []
@@ -85,7 +84,7 @@ async def lifespan(app: FastAPI):
     session_id = os.getenv("SESSION_ID", "unknown")
     workspace_path = os.getenv("WORKSPACE_PATH", "/workspace")
     
-    logger.info(f"Initializing AG-UI server for session {session_id}")
+    logger.info("Initializing AG-UI server for session %s", session_id)
     
     context = RunnerContext(
         session_id=session_id,
@@ -104,17 +103,19 @@ async def lifespan(app: FastAPI):
     # Check for INITIAL_PROMPT and auto-execute (only if no parent session)
     initial_prompt = os.getenv("INITIAL_PROMPT", "").strip()
     if initial_prompt and not parent_session_id:
-        logger.info(f"INITIAL_PROMPT detected ({len(initial_prompt)} chars), will auto-execute after 3s delay")
+        logger.info("INITIAL_PROMPT detected (%s chars), will auto-execute after 3s delay", len(initial_prompt))
         asyncio.create_task(auto_execute_initial_prompt(initial_prompt, session_id))
     elif initial_prompt:
-        logger.info(f"INITIAL_PROMPT detected but has parent session ({parent_session_id[:12]}...) - skipping")
+        logger.info("INITIAL_PROMPT detected but has parent session (%s...) - skipping", parent_session_id[:12])
     
-    logger.info(f"AG-UI server ready for session {session_id}")
+    logger.info("AG-UI server ready for session %s", session_id)
     
     yield
     
     # Cleanup
     logger.info("Shutting down AG-UI server...")
+    if adapter is not None:
+        await adapter.close()
 
 
 async def auto_execute_initial_prompt(prompt: str, session_id: str):
@@ -144,7 +145,7 @@ async def auto_execute_initial_prompt(prompt: str, session_id: str):
     
     # BACKEND_API_URL already includes /api suffix from operator
     url = f"{backend_url}/projects/{project_name}/agentic-sessions/{session_id}/agui/run"
-    logger.info(f"Auto-execution URL: {url}")
+    logger.info("Auto-execution URL: %s", url)
     
     payload = {
         "threadId": session_id,
@@ -172,12 +173,12 @@ async def auto_execute_initial_prompt(prompt: str, session_id: str):
             async with session.post(url, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=30)) as resp:
                 if resp.status == 200:
                     result = await resp.json()
-                    logger.info(f"INITIAL_PROMPT auto-execution started: {result}")
+                    logger.info("INITIAL_PROMPT auto-execution started: %s", result)
                 else:
                     error_text = await resp.text()
-                    logger.warning(f"INITIAL_PROMPT failed with status {resp.status}: {error_text[:200]}")
+                    logger.warning("INITIAL_PROMPT failed with status %s: %s", resp.status, error_text[:200])
     except Exception as e:
-        logger.warning(f"INITIAL_PROMPT auto-execution error (backend will retry): {e}")
+        logger.warning("INITIAL_PROMPT auto-execution error (backend will retry): %s", e)
 
 
 
@@ -213,7 +214,7 @@ async def run_agent(input_data: RunnerInput, request: Request):
     accept_header = request.headers.get("accept", "text/event-stream")
     encoder = EventEncoder(accept=accept_header)
     
-    logger.info(f"Processing run: thread_id={run_agent_input.thread_id}, run_id={run_agent_input.run_id}")
+    logger.info("Processing run: thread_id=%s, run_id=%s", run_agent_input.thread_id, run_agent_input.run_id)
     
     async def event_generator():
         """Generate AG-UI events from adapter."""
@@ -226,7 +227,7 @@ async def run_agent(input_data: RunnerInput, request: Request):
             if not _adapter_initialized:
                 logger.info("First run - initializing adapter with workspace preparation")
                 async for event in adapter.initialize(context):
-                    logger.debug(f"Yielding initialization event: {event.type}")
+                    logger.debug("Yielding initialization event: %s", event.type)
                     yield encoder.encode(event)
                 logger.info("Adapter initialization complete")
                 _adapter_initialized = True
@@ -235,11 +236,11 @@ async def run_agent(input_data: RunnerInput, request: Request):
             
             # Process the run (creates fresh client each time)
             async for event in adapter.process_run(run_agent_input):
-                logger.debug(f"Yielding run event: {event.type}")
+                logger.debug("Yielding run event: %s", event.type)
                 yield encoder.encode(event)
             logger.info("adapter.process_run() completed")
         except Exception as e:
-            logger.error(f"Error in event generator: {e}")
+            logger.error("Error in event generator: %s", e)
             # Yield error event
             from ag_ui.core import RunErrorEvent, EventType
             error_event = RunErrorEvent(
@@ -279,7 +280,7 @@ async def interrupt_run():
         
         return {"message": "Interrupt signal sent to Claude SDK"}
     except Exception as e:
-        logger.error(f"Interrupt failed: {e}")
+        logger.error("Interrupt failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -300,7 +301,7 @@ async def change_workflow(request: Request):
     branch = body.get("branch", "main")
     path = body.get("path", "")
     
-    logger.info(f"Workflow change request: {git_url}@{branch} (path: {path})")
+    logger.info("Workflow change request: %s@%s (path: %s)", git_url, branch, path)
     
     # Update environment variables
     os.environ["ACTIVE_WORKFLOW_GIT_URL"] = git_url
@@ -373,19 +374,23 @@ async def trigger_workflow_greeting(git_url: str, branch: str, path: str):
             async with session.post(url, json=payload, headers=headers) as resp:
                 if resp.status == 200:
                     result = await resp.json()
-                    logger.info(f"Workflow greeting started: {result}")
+                    logger.info("Workflow greeting started: %s", result)
                 else:
                     error_text = await resp.text()
-                    logger.error(f"Workflow greeting failed: {resp.status} - {error_text}")
+                    logger.error("Workflow greeting failed: %s - %s", resp.status, error_text)
     
     except Exception as e:
-        logger.error(f"Failed to trigger workflow greeting: {e}")
+        logger.error("Failed to trigger workflow greeting: %s", e)
 
 
 @app.post("/repos/add")
 async def add_repo(request: Request):
     """
-    Add repository - triggers Claude SDK client restart.
+    Add repository - re-prepares the workspace on the next run.
+
+    Existing checkouts are kept. The conversation continues unless this
+    moves Claude's working directory (e.g. the first repo added, or the
+    main repo removed), in which case the next run starts a new one.
     
     Accepts: {"url": "...", "branch": "...", "name": "..."}
     """
@@ -395,17 +400,9 @@ async def add_repo(request: Request):
         raise HTTPException(status_code=503, detail="Adapter not initialized")
     
     body = await request.json()
-    logger.info(f"Add repo request: {body}")
-    
-    # Update REPOS_JSON env var
-    repos_json = os.getenv("REPOS_JSON", "[]")
-    try:
-        repos = json.loads(repos_json) if repos_json else []
-    except:
-        repos = []
+    logger.info("Add repo request: %s", body)
     
-    # Add new repo
-    repos.append({
+    adapter.add_repo({
         "name": body.get("name", ""),
         "input": {
             "url": body.get("url", ""),
@@ -413,13 +410,10 @@ async def add_repo(request: Request):
         }
     })
     
-    os.environ["REPOS_JSON"] = json.dumps(repos)
-    
-    # Reset adapter state
+    # Re-run workspace setup; the adapter restarts the conversation if the cwd moves
     _adapter_initialized = False
-    adapter._first_run = True
     
-    logger.info(f"Repo added, adapter will reinitialize on next run")
+    logger.info("Repo added, workspace will be re-prepared on next run")
     
     return {"message": "Repository added"}
 
@@ -427,7 +421,11 @@ async def add_repo(request: Request):
 @app.post("/repos/remove")
 async def remove_repo(request: Request):
     """
-    Remove repository - triggers Claude SDK client restart.
+    Remove repository - re-prepares the workspace on the next run.
+
+    Existing checkouts are kept. The conversation continues unless this
+    moves Claude's working directory (e.g. the first repo added, or the
+    main repo removed), in which case the next run starts a new one.
     
     Accepts: {"name": "..."}
     """
@@ -438,25 +436,14 @@ async def remove_repo(request: Request):
     
     body = await request.json()
     repo_name = body.get("name", "")
-    logger.info(f"Remove repo request: {repo_name}")
-    
-    # Update REPOS_JSON env var
-    repos_json = os.getenv("REPOS_JSON", "[]")
-    try:
-        repos = json.loads(repos_json) if repos_json else []
-    except:
-        repos = []
+    logger.info("Remove repo request: %s", repo_name)
     
-    # Remove repo by name
-    repos = [r for r in repos if r.get("name") != repo_name]
+    adapter.remove_repo(repo_name)
     
-    os.environ["REPOS_JSON"] = json.dumps(repos)
-    
-    # Reset adapter state
+    # Re-run workspace setup; the adapter restarts the conversation if the cwd moves
     _adapter_initialized = False
-    adapter._first_run = True
     
-    logger.info(f"Repo removed, adapter will reinitialize on next run")
+    logger.info("Repo removed, workspace will be re-prepared on next run")
     
     return {"message": "Repository removed"}
 
@@ -475,7 +462,7 @@ def main():
     port = int(os.getenv("AGUI_PORT", "8000"))
     host = os.getenv("AGUI_HOST", "0.0.0.0")
     
-    logger.info(f"Starting Claude Code AG-UI server on {host}:{port}")
+    logger.info("Starting Claude Code AG-UI server on %s:%s", host, port)
     
     uvicorn.run(
         app,
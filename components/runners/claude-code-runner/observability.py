@@ -54,6 +54,10 @@ from security_utils import (
     with_sync_timeout,
 )
 
+# Accepted spellings for boolean environment flags
+_TRUTHY_ENV_VALUES = frozenset({"1", "true", "yes"})
+_FALSY_ENV_VALUES = frozenset({"0", "false", "no"})
+
 
 def _privacy_masking_function(data: Any, **kwargs) -> Any:
     """Mask sensitive user inputs and outputs while preserving usage metrics.
@@ -144,11 +148,7 @@ class ObservabilityManager:
         Returns:
             True if Langfuse initialized successfully
         """
-        langfuse_enabled = os.getenv("LANGFUSE_ENABLED", "").strip().lower() in (
-            "1",
-            "true",
-            "yes",
-        )
+        langfuse_enabled = os.getenv("LANGFUSE_ENABLED", "").strip().lower() in _TRUTHY_ENV_VALUES
         if not langfuse_enabled:
             return False
 
@@ -188,7 +188,7 @@ class ObservabilityManager:
             # Default: MASK messages (privacy-first approach)
             # Set LANGFUSE_MASK_MESSAGES=false to explicitly disable masking (dev/testing only)
             mask_messages_env = os.getenv("LANGFUSE_MASK_MESSAGES", "true").strip().lower()
-            enable_masking = mask_messages_env not in ("false", "0", "no")
+            enable_masking = mask_messages_env not in _FALSY_ENV_VALUES
 
             if enable_masking:
                 logging.info("Langfuse: Privacy masking ENABLED - user messages and responses will be redacted")
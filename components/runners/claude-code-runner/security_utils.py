@@ -5,14 +5,25 @@ Provides exception sanitization and timeout wrappers
 to prevent API key leaks and hanging operations.
 """
 
+import os
 import re
 import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Any, TypeVar, ParamSpec
 
 P = ParamSpec("P")
 T = TypeVar("T")
 
+# Dedicated pool for with_sync_timeout: an operation that times out keeps its
+# thread, so it must not be able to exhaust the loop's shared default executor.
+# Sized at least like the default pool (min(32, cpus + 4)) and never below 8, so
+# a few hung calls (e.g. stuck Langfuse flushes) leave room for later ones.
+_SYNC_TIMEOUT_EXECUTOR = ThreadPoolExecutor(
+    max_workers=max(8, min(32, (os.cpu_count() or 1) + 4)),
+    thread_name_prefix="sync-timeout",
+)
+
 
 def sanitize_exception_message(
     exception: Exception, secrets_to_redact: dict[str, str]
@@ -125,12 +136,12 @@ async def with_sync_timeout(
     Returns:
         Tuple of (success, result_or_None)
     """
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
 
     try:
         # Run sync function in executor with timeout
         result = await asyncio.wait_for(
-            loop.run_in_executor(None, lambda: func(*args, **kwargs)),
+            loop.run_in_executor(_SYNC_TIMEOUT_EXECUTOR, lambda: func(*args, **kwargs)),
             timeout=timeout_seconds,
         )
         return True, result
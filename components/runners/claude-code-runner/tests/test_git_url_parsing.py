@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Test git URL parsing helpers in the adapter.
+
+Validates that:
+1. Plain https and ssh URLs parse to (owner, repo, host)
+2. Query strings and fragments never leak into owner/repo names
+3. Repo names derive from owner/repo, not from trailing tree/branch paths
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from adapter import _derive_repo_name, _parse_owner_repo
+
+
+def test_parse_plain_urls():
+    """Test the common https and ssh shapes."""
+    assert _parse_owner_repo("https://github.com/o/r") == ("o", "r", "github.com")
+    assert _parse_owner_repo("https://github.com/o/r.git") == ("o", "r", "github.com")
+    assert _parse_owner_repo("git@github.com:o/r.git") == ("o", "r", "github.com")
+
+
+def test_parse_url_with_query():
+    """Test that a query string is not part of the repo name."""
+    assert _parse_owner_repo("https://github.com/o/r?x=1") == ("o", "r", "github.com")
+
+
+def test_parse_url_with_fragment():
+    """Test that a fragment (and the .git before it) is not part of the repo name."""
+    assert _parse_owner_repo("https://github.com/o/r.git#frag") == ("o", "r", "github.com")
+
+
+def test_derive_repo_name():
+    """Test deriving the workflow/repo directory name from a URL."""
+    assert _derive_repo_name("https://github.com/o/r.git") == "r"
+    assert _derive_repo_name("https://github.com/o/r?x=1") == "r"
+    assert _derive_repo_name("https://github.com/o/r.git#frag") == "r"
+    assert _derive_repo_name("https://github.com/o/r/tree/main") == "r"
@@ -20,9 +20,48 @@ Exit codes:
 import json
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional, Tuple
+
+try:
+    import orjson  # Optional; parses bytes directly and faster than stdlib json
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    import tomllib  # Python 3.11+
+except ImportError:
+    try:
+        import tomli as tomllib  # Fallback for Python 3.10
+    except ImportError:
+        tomllib = None
+
+try:
+    from packaging.requirements import InvalidRequirement, Requirement
+except ImportError:
+    Requirement = None  # Fall back to the simple regex below
+
+# Direct go.mod requirement: module_name vX.Y.Z
+_GO_DEP_RE = re.compile(r"^\s*([a-zA-Z0-9.\-_/]+)\s+v([0-9]+\.[0-9]+\.[0-9]+)")
+
+# go.mod lines that are never requirements (block ends, comments, directives)
+_GO_MOD_SKIP_PREFIXES = (")", "//", "module ", "go ", "toolchain ")
+
+# Fallback for PEP 508 requirements when packaging is unavailable:
+# "package>=version" or "package[extras]>=version"
+_PY_DEP_RE = re.compile(r"([a-zA-Z0-9\-_]+)(\[[^\]]+\])?(>=|==)([0-9.]+)")
+
+# AUTO-GENERATED section of amber.md; group 1 is the body after the start marker comment
+_START_MARKER = "<!-- AUTO-GENERATED: Dependencies"
+_END_MARKER = "<!-- END AUTO-GENERATED: Dependencies -->"
+_MARKER_RE = re.compile(
+    re.escape(_START_MARKER.encode()) + rb".*?-->(.*?)" + re.escape(_END_MARKER.encode()),
+    re.DOTALL,
+)
 
 
 def parse_go_mod(file_path: Path) -> Dict[str, str]:
@@ -37,30 +76,57 @@ def parse_go_mod(file_path: Path) -> Dict[str, str]:
     Example:
         {'k8s.io/api': '0.34.0', 'github.com/gin-gonic/gin': '1.10.1'}
     """
-    if not file_path.exists():
+    dependencies = {}
+
+    # Match direct dependencies (not indirect)
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                # Skip indirect dependencies and lines that can never hold a requirement
+                if "// indirect" in line:
+                    continue
+                stripped = line.lstrip()
+                if not stripped or stripped.startswith(_GO_MOD_SKIP_PREFIXES):
+                    continue
+
+                match = _GO_DEP_RE.match(line)
+                if match:
+                    module, version = match.groups()
+                    dependencies[module] = version
+    except FileNotFoundError:
         print(f"Warning: {file_path} not found, skipping")
         return {}
 
-    dependencies = {}
+    return dependencies
 
-    with open(file_path, "r") as f:
-        content = f.read()
 
-    # Match direct dependencies (not indirect)
-    # Format: module_name v.X.Y.Z
-    pattern = r"^\s*([a-zA-Z0-9.\-_/]+)\s+v([0-9]+\.[0-9]+\.[0-9]+)"
+def parse_requirement(dep: str) -> Optional[Tuple[str, str]]:
+    """Split a PEP 508 requirement string into name (with extras) and version constraint.
 
-    for line in content.split("\n"):
-        # Skip indirect dependencies
-        if "// indirect" in line:
-            continue
+    Args:
+        dep: Requirement string from project.dependencies
 
-        match = re.match(pattern, line.strip())
-        if match:
-            module, version = match.groups()
-            dependencies[module] = version
+    Returns:
+        (name, constraint) tuple, or None if the requirement has no version constraint
 
-    return dependencies
+    Example:
+        'anthropic[vertex]>=0.68.0' -> ('anthropic[vertex]', '>=0.68.0')
+    """
+    if Requirement is None:
+        match = _PY_DEP_RE.match(dep)
+        if not match:
+            return None
+        package, extras, operator, version = match.groups()
+        return package + (extras or ""), f"{operator}{version}"
+
+    try:
+        req = Requirement(dep)
+    except InvalidRequirement:
+        return None
+    if not req.specifier:
+        return None
+    extras = f"[{','.join(sorted(req.extras))}]" if req.extras else ""
+    return req.name + extras, str(req.specifier)
 
 
 def parse_pyproject_toml(file_path: Path) -> Dict[str, str]:
@@ -75,18 +141,11 @@ def parse_pyproject_toml(file_path: Path) -> Dict[str, str]:
     Example:
         {'anthropic': '>=0.68.0', 'claude-agent-sdk': '>=0.1.4'}
     """
-    if not file_path.exists():
-        print(f"Warning: {file_path} not found, skipping")
-        return {}
-
     dependencies = {}
 
     try:
-        # Try to import toml library
-        try:
-            import tomllib  # Python 3.11+
-        except ImportError:
-            import tomli as tomllib  # Fallback for Python 3.10
+        if tomllib is None:
+            raise ImportError("tomllib (Python 3.11+) or tomli is required")
 
         with open(file_path, "rb") as f:
             data = tomllib.load(f)
@@ -94,15 +153,14 @@ def parse_pyproject_toml(file_path: Path) -> Dict[str, str]:
         # Extract from project.dependencies array
         if "project" in data and "dependencies" in data["project"]:
             for dep in data["project"]["dependencies"]:
-                # Format: "package>=version" or "package[extras]>=version"
-                match = re.match(r"([a-zA-Z0-9\-_]+)(\[[^\]]+\])?(>=|==)([0-9.]+)", dep)
-                if match:
-                    package = match.group(1)
-                    extras = match.group(2) or ""
-                    operator = match.group(3)
-                    version = match.group(4)
-                    dependencies[package + extras] = f"{operator}{version}"
+                parsed = parse_requirement(dep)
+                if parsed:
+                    package, constraint = parsed
+                    dependencies[package] = constraint
 
+    except FileNotFoundError:
+        print(f"Warning: {file_path} not found, skipping")
+        return {}
     except Exception as e:
         print(f"Error parsing {file_path}: {e}")
         return {}
@@ -122,24 +180,23 @@ def parse_package_json(file_path: Path) -> Dict[str, str]:
     Example:
         {'next': '15.1.4', 'react': '19.0.0'}
     """
-    if not file_path.exists():
-        print(f"Warning: {file_path} not found, skipping")
-        return {}
-
     dependencies = {}
 
     try:
-        with open(file_path, "r") as f:
-            data = json.load(f)
+        with open(file_path, "rb") as f:
+            data = _json_loads(f.read())
 
         # Combine dependencies and devDependencies
-        for dep_type in ["dependencies", "devDependencies"]:
-            if dep_type in data:
-                for package, version in data[dep_type].items():
-                    # Remove ^ or ~ prefix if present
-                    clean_version = version.lstrip("^~")
-                    dependencies[package] = clean_version
-
+        for dep_type in ("dependencies", "devDependencies"):
+            for package, version in data.get(dep_type, {}).items():
+                # Remove ^ or ~ prefix if present
+                if version[:1] in ("^", "~"):
+                    version = version[1:]
+                dependencies[package] = version
+
+    except FileNotFoundError:
+        print(f"Warning: {file_path} not found, skipping")
+        return {}
     except Exception as e:
         print(f"Error parsing {file_path}: {e}")
         return {}
@@ -173,14 +230,14 @@ def generate_dependency_markdown(
     websocket_version = go_deps.get("github.com/gorilla/websocket", "unknown")
     jwt_version = go_deps.get("github.com/golang-jwt/jwt/v5", "unknown")
 
-    anthropic_version = python_runner.get("anthropic[vertex]", python_runner.get("anthropic", "unknown"))
+    anthropic_version = python_runner.get("anthropic[vertex]") or python_runner.get("anthropic", "unknown")
     sdk_version = python_runner.get("claude-agent-sdk", "unknown")
 
     next_version = js_frontend.get("next", "unknown")
     react_version = js_frontend.get("react", "unknown")
     react_query_version = js_frontend.get("@tanstack/react-query", "unknown")
 
-    langfuse_version = python_runner.get("langfuse", js_frontend.get("langfuse", "unknown"))
+    langfuse_version = python_runner.get("langfuse") or js_frontend.get("langfuse", "unknown")
 
     markdown = f"""**Kubernetes Ecosystem:**
 - `k8s.io/{{api,apimachinery,client-go}}@{k8s_version}` - Watch for breaking changes in 1.31+
@@ -221,34 +278,30 @@ def update_amber_agent_file(new_content: str, agent_file: Path) -> bool:
     Returns:
         True if file was modified, False if no changes needed
     """
-    if not agent_file.exists():
+    # Work on raw bytes so the common no-change run never decodes the file
+    try:
+        with open(agent_file, "rb") as f:
+            content = f.read()
+    except FileNotFoundError:
         print(f"Error: {agent_file} not found")
         return False
 
-    with open(agent_file, "r") as f:
-        content = f.read()
+    # Find AUTO-GENERATED markers and the content between them in one pass
+    match = _MARKER_RE.search(content)
 
-    # Find AUTO-GENERATED markers
-    start_marker = "<!-- AUTO-GENERATED: Dependencies"
-    end_marker = "<!-- END AUTO-GENERATED: Dependencies -->"
-
-    start_idx = content.find(start_marker)
-    end_idx = content.find(end_marker)
-
-    if start_idx == -1 or end_idx == -1:
+    if match is None:
         print("Error: AUTO-GENERATED markers not found in agent file")
         print("Expected markers:")
-        print(f"  {start_marker}")
-        print(f"  {end_marker}")
+        print(f"  {_START_MARKER}")
+        print(f"  {_END_MARKER}")
         return False
 
-    # Extract current content between markers
-    # Skip to end of start marker comment line
-    start_content_idx = content.find("\n", start_idx) + 1
-    current_content = content[start_content_idx:end_idx].strip()
+    # Current content runs from the end of the start marker comment (which spans
+    # several lines and carries the timestamp) to the end marker
+    current_content = match.group(1).strip()
 
     # Check if content actually changed
-    if current_content == new_content.strip():
+    if current_content == new_content.strip().encode():
         print("✓ Dependency versions are already current - no update needed")
         return False
 
@@ -260,14 +313,12 @@ def update_amber_agent_file(new_content: str, agent_file: Path) -> bool:
 
 {new_content}
 
-{end_marker}"""
+{_END_MARKER}"""
 
-    new_file_content = (
-        content[:start_idx] + new_marker + content[end_idx + len(end_marker) :]
-    )
+    new_file_content = content[: match.start()] + new_marker.encode() + content[match.end() :]
 
     # Write updated content
-    with open(agent_file, "w") as f:
+    with open(agent_file, "wb") as f:
         f.write(new_file_content)
 
     print(f"✅ Updated {agent_file} with current dependency versions")
@@ -294,20 +345,29 @@ def main() -> int:
     # Parse dependency files
     print("Parsing dependency files...")
 
-    go_backend = parse_go_mod(repo_root / "components" / "backend" / "go.mod")
+    # The files are independent, so read and parse them concurrently
+    components = repo_root / "components"
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        go_backend_future = executor.submit(parse_go_mod, components / "backend" / "go.mod")
+        go_operator_future = executor.submit(parse_go_mod, components / "operator" / "go.mod")
+        python_runner_future = executor.submit(
+            parse_pyproject_toml,
+            components / "runners" / "claude-code-runner" / "pyproject.toml",
+        )
+        js_frontend_future = executor.submit(
+            parse_package_json, components / "frontend" / "package.json"
+        )
+
+    go_backend = go_backend_future.result()
     print(f"  Backend (Go): {len(go_backend)} dependencies")
 
-    go_operator = parse_go_mod(repo_root / "components" / "operator" / "go.mod")
+    go_operator = go_operator_future.result()
     print(f"  Operator (Go): {len(go_operator)} dependencies")
 
-    python_runner = parse_pyproject_toml(
-        repo_root / "components" / "runners" / "claude-code-runner" / "pyproject.toml"
-    )
+    python_runner = python_runner_future.result()
     print(f"  Runner (Python): {len(python_runner)} dependencies")
 
-    js_frontend = parse_package_json(
-        repo_root / "components" / "frontend" / "package.json"
-    )
+    js_frontend = js_frontend_future.result()
     print(f"  Frontend (JavaScript): {len(js_frontend)} dependencies")
 
     print()
@@ -9,10 +9,38 @@ Tests:
 3. String concatenation is used instead of template literals for markdown with ---
 """
 
+import functools
+import io
 import yaml
 import re
 import sys
-from pathlib import Path
+from collections import deque
+
+try:
+    from yaml import CSafeLoader as SafeLoader  # libyaml-backed, much faster
+except ImportError:
+    from yaml import SafeLoader
+
+# transparencySection built with string concatenation (the PR #419 fix)
+STRING_CONCAT_RE = re.compile(r"const transparencySection = '[^']*'\s*\+")
+# transparencySection built with a template literal
+TEMPLATE_LITERAL_RE = re.compile(r"const transparencySection = `")
+# The original PR #419 bug: template literal containing a standalone ---
+PR_419_PROBLEM_RE = re.compile(r"const\s+transparencySection\s*=\s*`[\s\S]*?\n---\n")
+
+@functools.lru_cache(maxsize=None)
+def read_workflow(workflow_path):
+    """Return a workflow file's text, or None if it does not exist (read once per path)"""
+    try:
+        with open(workflow_path, 'r') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+@functools.lru_cache(maxsize=None)
+def parse_workflow(workflow_path):
+    """Return a workflow file parsed as YAML (parsed once per path; raises yaml.YAMLError)"""
+    return yaml.load(read_workflow(workflow_path), Loader=SafeLoader)
 
 def test_yaml_syntax():
     """Test 1: Validate all Amber workflow YAML files parse correctly"""
@@ -27,16 +55,13 @@ def test_yaml_syntax():
 
     all_valid = True
     for workflow_path in workflows:
-        path = Path(workflow_path)
-        if not path.exists():
+        if read_workflow(workflow_path) is None:
             print(f"✗ {workflow_path} - File not found")
             all_valid = False
             continue
 
         try:
-            with open(path, 'r') as f:
-                content = f.read()
-                yaml.safe_load(content)
+            parse_workflow(workflow_path)
             print(f"✓ {workflow_path} - Valid YAML")
         except yaml.YAMLError as e:
             print(f"✗ {workflow_path} - YAML Error:")
@@ -52,21 +77,20 @@ def test_no_standalone_separators():
     print("-" * 50)
 
     workflow_path = ".github/workflows/amber-auto-review.yml"
-    path = Path(workflow_path)
+    content = read_workflow(workflow_path)
 
-    if not path.exists():
+    if content is None:
         print(f"✗ {workflow_path} - File not found")
         return False
 
-    with open(path, 'r') as f:
-        lines = f.readlines()
-
     # Find standalone --- lines (excluding first line which is YAML header)
     problematic_lines = []
-    for i, line in enumerate(lines[1:], start=2):  # Skip first line, start counting at 2
-        if line.strip() == "---":
+    window = deque(maxlen=10)  # Current line plus the 9 before it
+    for i, line in enumerate(io.StringIO(content), start=1):
+        window.append(line)
+        if i > 1 and line.strip() == "---":
             # Check if it's in a JavaScript context (crude check)
-            context = "".join(lines[max(0, i-10):i])
+            context = "".join(window)
             if "const " in context or "script:" in context:
                 problematic_lines.append((i, line.strip()))
 
@@ -86,15 +110,12 @@ def test_string_concatenation_used():
     print("-" * 50)
 
     workflow_path = ".github/workflows/amber-auto-review.yml"
-    path = Path(workflow_path)
+    content = read_workflow(workflow_path)
 
-    if not path.exists():
+    if content is None:
         print(f"✗ {workflow_path} - File not found")
         return False
 
-    with open(path, 'r') as f:
-        content = f.read()
-
     # Check for the transparencySection variable
     if "const transparencySection = " not in content:
         print("⚠ transparencySection not found (may have been renamed)")
@@ -102,11 +123,8 @@ def test_string_concatenation_used():
 
     # Look for the pattern: const transparencySection = '\n\n---\n...
     # This indicates string concatenation with + operator
-    string_concat_pattern = r"const transparencySection = '[^']*'\s*\+"
-    template_literal_pattern = r"const transparencySection = `"
-
-    uses_string_concat = re.search(string_concat_pattern, content) is not None
-    uses_template_literal = re.search(template_literal_pattern, content) is not None
+    uses_string_concat = STRING_CONCAT_RE.search(content) is not None
+    uses_template_literal = TEMPLATE_LITERAL_RE.search(content) is not None
 
     if uses_template_literal and not uses_string_concat:
         print("✗ Using template literals (backticks) - this can cause YAML parsing errors")
@@ -125,14 +143,12 @@ def test_workflow_structure():
     print("-" * 50)
 
     workflow_path = ".github/workflows/amber-auto-review.yml"
-    path = Path(workflow_path)
 
-    if not path.exists():
+    if read_workflow(workflow_path) is None:
         print(f"✗ {workflow_path} - File not found")
         return False
 
-    with open(path, 'r') as f:
-        workflow = yaml.safe_load(f)
+    workflow = parse_workflow(workflow_path)
 
     checks = []
 
@@ -179,23 +195,18 @@ def test_pr_419_regression():
     print("-" * 50)
 
     workflow_path = ".github/workflows/amber-auto-review.yml"
-    path = Path(workflow_path)
+    content = read_workflow(workflow_path)
 
-    if not path.exists():
+    if content is None:
         print(f"✗ {workflow_path} - File not found")
         return False
 
-    with open(path, 'r') as f:
-        content = f.read()
-
     # The original issue: template literal with --- causing YAML parsing error
     # Look for the pattern that was problematic:
     #   const transparencySection = `
     #
     #   ---
-    problematic_pattern = r"const\s+transparencySection\s*=\s*`[\s\S]*?\n---\n"
-
-    if re.search(problematic_pattern, content):
+    if PR_419_PROBLEM_RE.search(content):
         print("✗ REGRESSION: Found the problematic pattern from PR #419")
         print("  Template literal contains standalone --- which breaks YAML parsing")
         return False